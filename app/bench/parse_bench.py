@@ -0,0 +1,231 @@
+"""Offline parse benchmark, canlı sitelere gitmeden kayıtlı HTML fixture'ları üzerinde.
+
+app/ dizininden çalıştırılır:
+    PYTHONPATH=.. python -m app.bench.parse_bench
+    PYTHONPATH=.. python -m app.bench.parse_bench --compare bench/results/<eski>.json
+
+Sonuçlar JSON olarak bench/results/<commit>.json dosyasına yazılır; --compare ile
+iki commit arasındaki median süreler karşılaştırılır.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+# server.py içe aktarılırken SQLite cache dosyası açılmasın
+os.environ.setdefault("CACHE_BACKEND", "memory")
+
+from app.scrapers.bs4_scraper import BS4_SCRAPERS, parse_bs4_products  # noqa: E402
+from app.scrapers.sel_scraper import SEL_SCRAPERS  # noqa: E402
+from app.server import include_by_keywords, exclude_by_keywords, filter_by_sites  # noqa: E402
+from app.utils.html_engines import get_engine  # noqa: E402
+from app.utils.price_utils import parse_price_to_int  # noqa: E402
+from app.utils.product import Product  # noqa: E402
+from app.utils.result_index import ResultIndex  # noqa: E402
+from app.utils.scrape_utils import make_soup  # noqa: E402
+from app.utils.selector_plans import compile_bs4_plan  # noqa: E402
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURES = BENCH_DIR / "fixtures"
+RESULTS = BENCH_DIR / "results"
+ENGINES = ["html.parser", "lxml", "selectolax"]
+
+
+def load_fixture(site: str) -> Optional[str]:
+    path = FIXTURES / f"{site}.html"
+    if not path.exists():
+        print(f"[skip] no fixture for {site} ({path})", file=sys.stderr)
+        return None
+    return path.read_text(encoding="utf-8")
+
+
+def measure(fn: Callable[[], Any], min_time: float = 0.5, repeat: int = 5) -> Dict[str, float]:
+    # Her tekrar en az min_time/repeat saniye sürecek kadar çağrı yapar; çağrı başına süre döner.
+    fn()  # ısınma
+    number = 1
+    while True:
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - t >= min_time / repeat:
+            break
+        number *= 2
+
+    per_call: List[float] = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - t) / number)
+
+    # Bellek: ayrı bir çağrıda, zamanlamayı etkilemesin diye
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        fn()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return {
+        "calls": number * repeat,
+        "median_s": statistics.median(per_call),
+        "min_s": min(per_call),
+        "mean_s": statistics.fmean(per_call),
+        "peak_bytes": peak,
+        "alloc_blocks": sum(max(s.count_diff, 0) for s in stats),
+    }
+
+
+def with_throughput(res: Dict[str, float], n: int, unit: str = "items") -> Dict[str, float]:
+    res[unit] = n
+    res[f"{unit}_per_s"] = n / res["median_s"] if res["median_s"] else 0.0
+    return res
+
+
+def bench_parsing(engines: List[str]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for spec in BS4_SCRAPERS:
+        html = load_fixture(spec.website)
+        if html is None:
+            continue
+        page = SimpleNamespace(page_source=html)
+        for name in engines:
+            plan = compile_bs4_plan(spec.__class__(**{**spec.__dict__, "parser": name}))
+            if plan.engine.name != name:
+                continue  # motor kurulu değil
+            key = f"{spec.website}/{name}"
+            n = len(parse_bs4_products(plan, make_soup(page, plan.engine, plan.strainer)))
+            out[f"make_soup/{key}"] = with_throughput(
+                measure(lambda: make_soup(page, plan.engine)), len(html), "bytes")
+            out[f"make_soup_scoped/{key}"] = with_throughput(
+                measure(lambda: make_soup(page, plan.engine, plan.strainer)), len(html), "bytes")
+            doc = make_soup(page, plan.engine, plan.strainer)
+            out[f"parse_bs4_products/{key}"] = with_throughput(
+                measure(lambda: parse_bs4_products(plan, doc)), n)
+            out[f"pipeline/{key}"] = with_throughput(
+                measure(lambda: parse_bs4_products(plan, make_soup(page, plan.engine, plan.strainer))), n)
+
+    # Selenium siteleri tarayıcıda okunur; burada sadece sayfa parse maliyeti ölçülür
+    for spec in SEL_SCRAPERS:
+        html = load_fixture(spec.website)
+        if html is None:
+            continue
+        page = SimpleNamespace(page_source=html)
+        for name in engines:
+            engine = get_engine(name)
+            if engine.name != name:
+                continue
+            out[f"make_soup/{spec.website}/{name}"] = with_throughput(
+                measure(lambda: make_soup(page, engine)), len(html), "bytes")
+    return out
+
+
+def sample_products(n_items: int) -> List[Product]:
+    # Fixture'lardan çıkan ürünleri n_items'a ulaşana kadar çoğaltır.
+    base: List[Product] = []
+    for spec in BS4_SCRAPERS:
+        html = load_fixture(spec.website)
+        if html is not None:
+            plan = compile_bs4_plan(spec)
+            base.extend(parse_bs4_products(plan, make_soup(SimpleNamespace(page_source=html), plan.engine)))
+    if not base:
+        return []
+    return [base[i % len(base)] for i in range(n_items)]
+
+
+def bench_filters(n_items: int) -> Dict[str, Any]:
+    items = sample_products(n_items)
+    if not items:
+        return {}
+    n = len(items)
+    prices = [p.price_text for p in items]
+    sites = {"amazon", "n11"}
+    keys, bans = ["iphone", "15"], ["kılıf", "cam", "kablo"]
+    index = ResultIndex(items)
+    return {
+        "parse_price_to_int": with_throughput(measure(lambda: [parse_price_to_int(t) for t in prices]), n),
+        "include_by_keywords": with_throughput(measure(lambda: include_by_keywords(items, keys)), n),
+        "exclude_by_keywords": with_throughput(measure(lambda: exclude_by_keywords(items, bans)), n),
+        "filter_by_sites": with_throughput(measure(lambda: filter_by_sites(items, sites)), n),
+        "sort_top5": with_throughput(measure(lambda: sorted(
+            (p for p in exclude_by_keywords(filter_by_sites(items, sites), bans) if p.price > 0),
+            key=lambda p: p.price)[:5]), n),
+        "result_index_build": with_throughput(measure(lambda: ResultIndex(items)), n),
+        "result_index_top5": with_throughput(measure(lambda: index.cheapest(5, sites, bans)), n),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    # median süresi threshold oranından fazla artan ölçümleri döndürür
+    regressions: List[str] = []
+    print(f"\n{'benchmark':<48} {'base ms':>10} {'now ms':>10} {'ratio':>7}")
+    for key, res in current["results"].items():
+        old = baseline["results"].get(key)
+        if not old:
+            continue
+        ratio = res["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<48} {old['median_s'] * 1000:>10.3f} {res['median_s'] * 1000:>10.3f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--items", type=int, default=5000, help="number of products for filter benchmarks")
+    ap.add_argument("--engines", default=",".join(ENGINES), help="comma separated parser engines")
+    ap.add_argument("--out", help="result JSON path (default: bench/results/<commit>.json)")
+    ap.add_argument("--compare", help="baseline result JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown ratio before flagging")
+    args = ap.parse_args(argv)
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    commit = git_commit()
+    results = {**bench_parsing(engines), **bench_filters(args.items)}
+    report = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    print(f"{'benchmark':<48} {'median ms':>10} {'per s':>12} {'peak KB':>9}")
+    for key, res in results.items():
+        rate = res.get("items_per_s", res.get("bytes_per_s", 0))
+        print(f"{key:<48} {res['median_s'] * 1000:>10.3f} {rate:>12.0f} {res['peak_bytes'] / 1024:>9.1f}")
+
+    out = Path(args.out) if args.out else RESULTS / f"{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nSaved {out}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,9 @@
 from typing import List
 
-from app.scrapers.bs4_scraper import scrape_trendyol, scrape_amazon, scrape_n11
-from app.scrapers.sel_scraper import scrape_hepsiburada
-from app.utils.url_composer import load_websites, build_url
+from app.scrapers.collector import collect_all_products
+from app.utils.url_composer import load_websites
 from app.utils.product import Product
 
-SCRAPER_MAP = {
-    "trendyol": scrape_trendyol,
-    "hepsiburada": scrape_hepsiburada,
-    "amazon": scrape_amazon,
-    "n11": scrape_n11,
-}
-
 def get_input(prompt: str) -> List[str]:
     s = input(prompt).strip()
     return [t for t in s.split() if t]
@@ -38,28 +30,6 @@ def include_by_keywords(products: List[Product], keys: List[str]) -> List[Produc
             out.append(p)
     return out
 
-def collect_all_products(websites, keywords: List[str]) -> List[Product]:
-    all_items: List[Product] = []
-    for w in websites:
-        url = build_url(w, keywords)
-        scraper = SCRAPER_MAP.get(w.name.lower())
-        if not scraper:
-            continue
-
-        try:
-            items: List[Product] = scraper(url)
-        except Exception as e:
-            print(f"[{w.name}] scraper error: {e}")
-            continue
-
-        if not items:
-            print(f"[{w.name}] Item not found.")
-            continue
-
-        all_items.extend(items)
-    return all_items
-
-
 def print_cheapest(products: List[Product], n: int = 5) -> None:
     sorted_items = sorted(
         (p for p in products if p.price > 0),
@@ -1,61 +1,62 @@
-from dataclasses import asdict
-
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from typing import List, Dict, Any, Optional
+from typing import List, Optional
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-
 from app.utils.log_config import logger
 from app.utils.price_utils import parse_price_to_int
 from app.utils.product import Product
-from app.utils.scrape_utils import extract_texts, open_browser, reject_cookies, make_soup, close_browser
+from app.utils.fetch_archive import record_page, recording, replay_page, replaying
+from app.utils.http_client import fetch_html
+from app.utils.metrics import stage
+from app.utils.scrape_utils import (open_browser, reject_cookies, item_html, close_browser, parse_html,
+                                    scroll_for_items, wait_for_items)
 from app.utils.scraper_models import Bs4Scraper, load_bs4_scrapers
+from app.utils.selector_plans import Bs4Plan, compile_bs4_plans
 
 BS4_SCRAPERS: list[Bs4Scraper] = load_bs4_scrapers("data/bs4_scrapers.json")
+# Seçiciler her sayfada yeniden parse edilmesin diye yüklemede bir kez derlenir
+BS4_PLANS: list[Bs4Plan] = compile_bs4_plans(BS4_SCRAPERS)
 
 
-def parse_bs4_products(spec: Dict[str, Any], soup: BeautifulSoup) -> List[Product]:
+def parse_bs4_products(plan: Bs4Plan, doc) -> List[Product]:
+    # doc, plan.engine.parse() çıktısıdır; motor ne olursa olsun aynı Product listesi döner.
+    eng = plan.engine
     out: List[Product] = []
-    sponsored_sel = spec.get("sponsored_sel")
-    id_attr = spec.get("id_attr")
-    dp_path = spec.get("dp_path")
 
-    for item in soup.select(spec["item_sel"]):
-        if sponsored_sel and item.select_one(sponsored_sel):
+    for item in eng.select(doc, plan.item):
+        if plan.sponsored and eng.select_one(item, plan.sponsored) is not None:
             continue
 
-        name = extract_texts(item, spec["title_sel"])
+        name = " ".join(t for t in (eng.text(eng.select_one(item, sel)) for sel in plan.title) if t).strip()
         if not name:
             continue
 
         price_text = ""
         price_int = 0
-        for sel in spec["price_sel"]:
-            price_el = item.select_one(sel)
-            if price_el:
-                price_text = price_el.get_text(strip=True)
+        for sel in plan.price:
+            price_el = eng.select_one(item, sel)
+            if price_el is not None:
+                price_text = eng.text(price_el)
                 price_int = parse_price_to_int(price_text)
                 break
 
-        a_el = None
-        for sel in spec["link_sel"]:
-            a_el = item.select_one(sel)
-            if a_el:
+        href = None
+        for sel in plan.link:
+            a_el = eng.select_one(item, sel)
+            if a_el is not None:
+                href = eng.attr(a_el, "href")
                 break
 
-        if a_el and a_el.has_attr("href"):
-            href = urljoin(spec["base_url"], a_el["href"])
+        if href is not None:
+            href = urljoin(plan.base_url, href)
         else:
-            pid = (item.get(id_attr, "").strip() if id_attr else "")
-            if pid and dp_path:
-                href = urljoin(spec["base_url"], dp_path.format(id=pid))
+            pid = ((eng.attr(item, plan.id_attr) or "").strip() if plan.id_attr else "")
+            if pid and plan.dp_path:
+                href = urljoin(plan.base_url, plan.dp_path.format(id=pid))
             else:
                 continue
 
         out.append(Product(
-            website=spec["website"],
+            website=plan.website,
             name=name,
             price_text=price_text,
             price=price_int,
@@ -65,19 +66,77 @@ def parse_bs4_products(spec: Dict[str, Any], soup: BeautifulSoup) -> List[Produc
     return out
 
 
-def scrape_bs4(site: int, url: str, timeout: int = 12) -> List[Product]:
-    spec = BS4_SCRAPERS[site]
-    d, w = open_browser(timeout)
+def scrape_bs4_http(spec: Bs4Scraper, plan: Bs4Plan, url: str, timeout: int = 12) -> Optional[List[Product]]:
+    # None dönerse çağıran taraf tarayıcıya düşmeli.
     try:
+        with stage(spec.website, "http_fetch"):
+            html = fetch_html(url, timeout)
+    except Exception as e:
+        logger.warning(f"[{spec.website}] HTTP fetch failed, falling back to browser: {e}")
+        return None
+
+    # Diğer yollardaki gibi ağaç kurma + çıkarma tek "parse" ölçümü
+    with stage(spec.website, "parse"):
         try:
+            doc = parse_html(html, plan.engine, plan.strainer)
+        except Exception as e:
+            logger.warning(f"[{spec.website}] HTTP page could not be parsed, falling back to browser: {e}")
+            return None
+        if plan.engine.select_one(doc, plan.item) is None:
+            logger.info(f"[{spec.website}] item_sel matched nothing over HTTP, falling back to browser")
+            return None
+        items = parse_bs4_products(plan, doc)
+    record_page(url, spec, html)
+    return items
+
+
+def scrape_bs4_replay(spec: Bs4Scraper, plan: Bs4Plan, url: str) -> List[Product]:
+    # Arşivdeki sayfa doğrudan parse edilir; tarayıcı ve ağ kullanılmaz.
+    html = replay_page(url, spec)
+    if html is None:
+        return []
+    with stage(spec.website, "parse"):
+        return parse_bs4_products(plan, parse_html(html, plan.engine, plan.strainer))
+
+
+def scrape_bs4_browser(spec: Bs4Scraper, plan: Bs4Plan, url: str, timeout: int = 12,
+                       scroll_steps: int = 0) -> List[Product]:
+    site = spec.website
+    with stage(site, "browser_start"):
+        d, w = open_browser(timeout, profile=spec.browser)
+    try:
+        with stage(site, "navigate"):
             d.get(url)
-            if spec.reject_cookie_ids:
+        if spec.reject_cookie_ids:
+            with stage(site, "cookies"):
                 reject_cookies(w, *spec.reject_cookie_ids)
-            w.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, spec.item_sel)))
-            soup = make_soup(d)
-            return parse_bs4_products(asdict(spec), soup)
-        except Exception as e:
-            logger.error(f"[{spec.website}] scrape_bs4 failed: {e}", exc_info=True)
+        ready = wait_for_items(d, site, spec.item_sel, spec.ready, timeout)
+        if ready.count == 0:
             return []
+        if scroll_steps:
+            with stage(site, "scroll"):
+                scroll_for_items(d, spec.item_sel, scroll_steps)
+        with stage(site, "page_source"):
+            if recording():
+                # Kayıt modunda her zaman tüm sayfa saklanır, replay parse yolundan bağımsız olsun
+                html = d.page_source
+                record_page(url, spec, html)
+            elif plan.items_only:
+                html = item_html(d, spec.item_sel, spec.sponsored_sel)
+            else:
+                html = d.page_source
+        with stage(site, "parse"):
+            return parse_bs4_products(plan, parse_html(html, plan.engine, plan.strainer))
     finally:
         close_browser(d)
+
+
+def scrape_bs4(site: int, url: str, timeout: int = 12, scroll_steps: int = 0) -> List[Product]:
+    spec, plan = BS4_SCRAPERS[site], BS4_PLANS[site]
+    if replaying():
+        return scrape_bs4_replay(spec, plan, url)
+    if spec.fetch_mode == "http":
+        items = scrape_bs4_http(spec, plan, url, timeout)
+        if items is not None:
+            return items
+    return scrape_bs4_browser(spec, plan, url, timeout, scroll_steps)
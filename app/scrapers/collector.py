@@ -0,0 +1,282 @@
+import heapq
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.scrapers.bs4_scraper import scrape_bs4
+from app.scrapers.sel_scraper import scrape_sel
+from app.utils.circuit_breaker import get_breaker
+from app.utils.driver_pool import PoolExhausted
+from app.utils.log_config import logger
+from app.utils.metrics import SCRAPE_PRODUCTS_TOTAL, SCRAPE_SECONDS, SCRAPES_IN_FLIGHT, SCRAPES_TOTAL
+from app.utils.product import Product
+from app.utils.singleflight import SingleFlight
+from app.utils.site_limits import LIMIT_QUEUE_TIMEOUT, get_limiter
+from app.utils.task_store import DONE, FAILED, get_task_store
+from app.utils.url_composer import Website, build_url
+
+SCRAPER_MAP = {
+    "trendyol": {"func": scrape_bs4, "index": 0},
+    "hepsiburada": {"func": scrape_sel, "index": 0},
+    "amazon": {"func": scrape_bs4, "index": 1},
+    "n11": {"func": scrape_bs4, "index": 2},
+}
+
+# Aynı anda kaç site taransın (0 = her site için bir worker)
+MAX_WORKERS = int(os.environ.get("SCRAPE_MAX_WORKERS", "0"))
+# Bir sitenin sonuç vermesi için beklenen en uzun süre (saniye)
+SITE_DEADLINE = float(os.environ.get("SCRAPE_SITE_DEADLINE", "30"))
+# Başlamayı bekleyen site varken deadline kontrolü aralığı (saniye)
+DEADLINE_POLL = 0.25
+
+# Sayfalamada erken durma: yeni sayfa sitenin en ucuz N ürününden ucuzunu getirmiyorsa dur
+EARLY_STOP_TOP_N = int(os.environ.get("SCRAPE_EARLY_STOP_TOP_N", "5"))
+
+# Aynı site URL'i aynı anda yalnızca bir kez taranır, diğer istekler sonucu bekler.
+SITE_FLIGHTS = SingleFlight()
+
+# local: sayfalar bu süreçte taranır; tasks: görev deposuna yazılır, worker.py süreçleri tarar
+SCRAPE_DISPATCH = os.environ.get("SCRAPE_DISPATCH", "local")
+
+# Bu sonuçlar "sayfa boş" değil, tarama yapılamadı demektir; worker görevi yeniden dener
+FAILED_OUTCOMES = {"error", "skipped", "throttled", "timeout"}
+
+
+@dataclass
+class ScrapeResult:
+    # outcome: "ok" | "empty" | "error" | "skipped" | "throttled" | "timeout"
+    outcome: str
+    items: List[Product] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        return self.outcome in FAILED_OUTCOMES
+
+
+def scraped(items: List[Product]) -> ScrapeResult:
+    return ScrapeResult("ok" if items else "empty", items)
+
+
+def scrape_page(w: Website, keywords: List[str], page: int = 1, until: Optional[float] = None) -> ScrapeResult:
+    url = build_url(w, keywords, page)
+    entry = SCRAPER_MAP.get(w.name.lower())
+    if not entry:
+        logger.error(f"[{w.name}] No scraper entry found in SCRAPER_MAP")
+        return ScrapeResult("error", error="no scraper entry")
+
+    site = w.name.lower()
+    if SCRAPE_DISPATCH == "tasks":
+        fn, args = dispatch_task, (site, url, w.scrollSteps, until)
+    else:
+        fn, args = run_scraper, (site, entry["func"], entry["index"], url, w.scrollSteps, until)
+    if page == 1:
+        return SITE_FLIGHTS.do(url, guarded_scrape, site, fn, *args)
+    return SITE_FLIGHTS.do(url, fn, *args)
+
+
+def guarded_scrape(site: str, fn, *args) -> ScrapeResult:
+    # Devre kesici site taraması başına bir kez, ilk sayfanın sonucuyla beslenir: sonraki
+    # sayfaların boş dönmesi normaldir, birleşen eşzamanlı aramalar da tek tarama sayılır
+    breaker = get_breaker(site)
+    if not breaker.allow():
+        SCRAPES_TOTAL.inc(site=site, outcome="skipped")
+        return ScrapeResult("skipped", error="circuit open")
+    try:
+        result = fn(*args)
+    except BaseException:
+        # Tarama sonucu yok (ör. görev deposu hatası); yarı açık devrenin deneme hakkı geri verilir
+        breaker.cancel()
+        raise
+    if result.outcome == "throttled":
+        # Tarama hiç başlamadı, site hakkında bir şey söylemez
+        breaker.cancel()
+    else:
+        breaker.record(result.outcome == "ok")
+    return result
+
+
+def dispatch_task(site: str, url: str, scroll_steps: int, until: Optional[float] = None) -> ScrapeResult:
+    # Taramayı bir worker'a bırakıp sonucu en fazla until'e (yoksa SITE_DEADLINE) kadar bekler
+    timeout = SITE_DEADLINE if until is None else max(0.0, until - time.monotonic())
+    store = get_task_store()
+    task_id = store.enqueue(site, url, scroll_steps)
+    task = store.wait(task_id, timeout)
+    if task.status == DONE:
+        return scraped(task.items)
+    if task.status == FAILED:
+        logger.error(f"[{site}] Task {task_id} failed: {task.error}")
+        return ScrapeResult("error", error=task.error)
+    last = f", last error: {task.error}" if task.error else ""
+    logger.warning(f"[{site}] No worker result for task {task_id} within {timeout:.1f}s "
+                   f"(still {task.status}{last})")
+    return ScrapeResult("timeout", error=task.error)
+
+
+def run_scraper(site: str, func, idx: int, url: str, scroll_steps: int, until: Optional[float] = None,
+                limited: bool = True) -> ScrapeResult:
+    # Tek bir sayfa taraması: site sınırları (oturum + hız) içinde çalışır,
+    # süre, devam eden tarama sayısı ve sonuç metrikleri yazılır.
+    # Sırada en fazla until'e kadar beklenir (çağıran o an vazgeçer); limited=False worker'lar
+    # içindir, sınırları görev deposu claim sırasında tüm worker'lar için uygulamıştır.
+    limiter = get_limiter(site) if limited else None
+    if limiter is not None:
+        timeout = LIMIT_QUEUE_TIMEOUT if until is None else min(LIMIT_QUEUE_TIMEOUT, until - time.monotonic())
+        try:
+            limiter.acquire(timeout)
+        except TimeoutError as e:
+            logger.warning(str(e))
+            SCRAPES_TOTAL.inc(site=site, outcome="throttled")
+            return ScrapeResult("throttled", error=str(e))
+    result = ScrapeResult("error")
+    try:
+        with SCRAPES_IN_FLIGHT.track(site=site), SCRAPE_SECONDS.time(site=site):
+            try:
+                result = scraped(func(idx, url, scroll_steps=scroll_steps))
+                SCRAPE_PRODUCTS_TOTAL.inc(len(result.items), site=site)
+            except PoolExhausted as e:
+                # Yerel sürücüler dolu; site hakkında bir şey söylemez, hız sınırı gibi sayılır
+                logger.warning(f"[{site}] {e}")
+                result = ScrapeResult("throttled", error=str(e))
+            except Exception as e:
+                logger.error(f"[{site}] Scrape failed for {url}: {e}", exc_info=True)
+                result.error = str(e) or type(e).__name__
+            finally:
+                SCRAPES_TOTAL.inc(site=site, outcome=result.outcome)
+    finally:
+        if limiter is not None:
+            limiter.release()
+    return result
+
+
+def keyword_matches(items: List[Product], keywords: List[str]) -> List[Product]:
+    # Adında aramadaki tüm kelimeler geçen ürünler
+    keys_cf = [k.casefold() for k in keywords]
+    return [p for p in items if all(k in (p.name or "").casefold() for k in keys_cf)]
+
+
+def price_cutoff(items: List[Product], keywords: List[str], n: int) -> float:
+    # Aramayla eşleşen ürünler arasında n. en ucuz fiyat; n ürün yoksa sınırsız.
+    prices = [p.price for p in keyword_matches(items, keywords) if p.price > 0]
+    smallest = heapq.nsmallest(n, prices)
+    return smallest[-1] if len(smallest) >= n else float("inf")
+
+
+def scrape_site(w: Website, keywords: List[str], until: Optional[float] = None) -> List[Product]:
+    # until (time.monotonic) verilirse sayfalama o ana kadar sürer: son tur kadar süre kalmadıysa
+    # yeni sayfa başlatılmaz, yetişmeyen sayfalar bırakılır ve o ana kadar toplananlar döner.
+    started = time.monotonic()
+    items = list(scrape_page(w, keywords, 1, until).items)
+    if not (w.pageParam and w.maxPages > 1 and items):
+        return items
+
+    took = time.monotonic() - started
+    page = 2
+    pages = ThreadPoolExecutor(max_workers=max(1, w.pageConcurrency), thread_name_prefix=f"page-{w.name}")
+    try:
+        while page <= w.maxPages:
+            if until is not None and time.monotonic() + took > until:
+                logger.info(f"[{w.name}] Not enough time left for page {page} before the deadline, "
+                            f"stopping pagination")
+                break
+            cutoff = price_cutoff(items, keywords, EARLY_STOP_TOP_N)
+            batch = list(range(page, min(page + max(1, w.pageConcurrency), w.maxPages + 1)))
+            batch_started = time.monotonic()
+            futures = [pages.submit(scrape_page, w, keywords, pg, until) for pg in batch]
+            left = None if until is None else max(0.0, until - batch_started)
+            done, late = wait(futures, timeout=left)
+            took = time.monotonic() - batch_started
+            new_items: List[Product] = []
+            for fut in futures:
+                if fut in done:
+                    new_items.extend(fut.result().items)
+            items.extend(new_items)
+            page += len(batch)
+
+            if late:
+                logger.warning(f"[{w.name}] {len(late)} of pages {batch} missed the deadline, "
+                               f"keeping the {len(items)} items collected so far")
+                break
+            if not new_items:
+                break
+            if not any(0 < p.price < cutoff for p in keyword_matches(new_items, keywords)):
+                logger.info(f"[{w.name}] Pages {batch} added nothing under the top-{EARLY_STOP_TOP_N} "
+                            f"price, stopping pagination")
+                break
+    finally:
+        # Bırakılan sayfaları bekleme; tarayıcılarını kendileri kapatırlar.
+        pages.shutdown(wait=False, cancel_futures=True)
+    return items
+
+
+def iter_site_results(websites: List[Website], keywords: List[str],
+                      max_workers: Optional[int] = None,
+                      deadline: Optional[float] = None) -> Iterator[Tuple[Website, List[Product]]]:
+    # Siteleri paralel tarar ve her siteyi biter bitmez (tamamlanma sırasıyla) verir.
+    # Hata veren ya da deadline'ı aşan siteler için boş liste döner.
+    # deadline her site için, o sitenin taraması bir worker'da başladığı andan itibaren sayılır;
+    # SCRAPE_MAX_WORKERS site sayısından azsa sırada beklenen süre deadline'dan yemez.
+    # scrape_site sayfalamayı deadline'da kendisi keser; buradaki kesinti bir yoklama aralığı
+    # sonra devreye girer ki geç kalan sayfalar yüzünden toplanmış sayfalar da kaybolmasın.
+    if not websites:
+        return
+
+    workers = max_workers if max_workers is not None else MAX_WORKERS
+    workers = workers or len(websites)
+    deadline = SITE_DEADLINE if deadline is None else deadline
+    limit = deadline + DEADLINE_POLL
+    started: Dict[str, float] = {}
+
+    def run(w: Website) -> List[Product]:
+        started[w.name] = time.monotonic()
+        return scrape_site(w, keywords, started[w.name] + deadline)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scrape")
+    try:
+        futures = {executor.submit(run, w): w for w in websites}
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            for fut in [f for f in pending if now - started.get(futures[f].name, now) >= limit]:
+                pending.discard(fut)
+                fut.cancel()
+                w = futures[fut]
+                logger.error(f"[{w.name}] Scraper exceeded deadline of {deadline:g}s")
+                yield w, []
+            if not pending:
+                break
+
+            # En yakın deadline'a kadar bekle; henüz başlamamış site varsa başlangıcını kaçırmamak için sık uyan
+            ends = [started[futures[f].name] + limit for f in pending if futures[f].name in started]
+            timeout = min(ends) - now if ends else DEADLINE_POLL
+            if len(ends) < len(pending):
+                timeout = min(timeout, DEADLINE_POLL)
+            done, _ = wait(pending, timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+            for fut in done:
+                pending.discard(fut)
+                w = futures[fut]
+                try:
+                    items: List[Product] = fut.result()
+                except Exception as e:
+                    logger.error(f"[{w.name}] Scraper execution failed: {e}", exc_info=True)
+                    items = []
+
+                if not items:
+                    logger.warning(f"[{w.name}] No items found.")
+                yield w, items or []
+    finally:
+        # Süresi dolan taramaları bekleme; tarayıcılarını kendileri kapatırlar.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def collect_all_products(websites: List[Website], keywords: List[str],
+                         max_workers: Optional[int] = None,
+                         deadline: Optional[float] = None) -> List[Product]:
+    # Sonuçlar her zaman websites sırasıyla birleştirilir.
+    by_site = {w.name: items for w, items in iter_site_results(websites, keywords, max_workers, deadline)}
+    all_items: List[Product] = []
+    for w in websites:
+        all_items.extend(by_site.get(w.name, []))
+    return all_items
@@ -1,33 +1,70 @@
 from typing import List
 from urllib.parse import urljoin
 
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-
-from app.utils.log_config import logger
+from app.utils.fetch_archive import record_page, recording, replay_url, replaying
+from app.utils.metrics import stage
 from app.utils.product import Product
 from app.utils.price_utils import parse_price_to_int
-from app.utils.scrape_utils import open_browser, close_browser, safe_text, safe_find, safe_first_text
+from app.utils.scrape_utils import open_browser, close_browser, scroll_for_items, wait_for_items
 from app.utils.scraper_models import SelScraper, load_sel_scrapers
 
 SEL_SCRAPERS: list[SelScraper] = load_sel_scrapers("data/sel_scrapers.json")
 
+# Tüm kartları tek bir execute_script çağrısıyla okur; kart başına WebDriver round trip'i yok.
+# arguments[0] = sel_extract_args(spec), dönüş: [href, title, brand, price_text] listeleri
+EXTRACT_JS = """
+const cfg = arguments[0];
+const text = (root, sel) => {
+    try {
+        const el = root.querySelector(sel);
+        return el ? (el.innerText || el.textContent || "").trim() : "";
+    } catch (e) {
+        return "";
+    }
+};
+const out = [];
+for (const a of document.querySelectorAll(cfg.item_sel)) {
+    let root = a;
+    if (cfg.root_xpath) {
+        try {
+            const r = document.evaluate(cfg.root_xpath, a, null,
+                XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            if (r) root = r;
+        } catch (e) {}
+    }
+    let price = "";
+    for (const sel of cfg.price_sel) {
+        price = text(root, sel);
+        if (price) break;
+    }
+    out.push([
+        a.href || a.getAttribute("href") || "",
+        (a.getAttribute(cfg.title_attr) || "").trim(),
+        cfg.brand_sel ? text(root, cfg.brand_sel) : "",
+        price,
+    ]);
+}
+return out;
+"""
 
-def parse_sel_products(spec: SelScraper, d, w) -> List[Product]:
-    out: List[Product] = []
 
-    w.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, spec.item_sel)))
-    cards = d.find_elements(By.CSS_SELECTOR, spec.item_sel)
+def sel_extract_args(spec: SelScraper) -> dict:
+    return {
+        "item_sel": spec.item_sel,
+        "title_attr": spec.title_attr,
+        "root_xpath": spec.root_xpath,
+        "brand_sel": spec.brand_sel,
+        "price_sel": spec.price_sel or [],
+    }
 
-    for a in cards:
-        href = urljoin(spec.base_url, a.get_attribute("href") or "")
-        title = (a.get_attribute(spec.title_attr) or "").strip()
 
-        root = safe_find(a, By.XPATH, spec.root_xpath) if spec.root_xpath else a
-        root = root or a
+def parse_sel_products(spec: SelScraper, d) -> List[Product]:
+    out: List[Product] = []
+
+    rows = d.execute_script(EXTRACT_JS, sel_extract_args(spec)) or []
 
-        brand = safe_text(root, By.CSS_SELECTOR, spec.brand_sel) if spec.brand_sel else ""
-        price_text = safe_first_text(root, spec.price_sel or [])
+    for raw_href, title, brand, price_text in rows:
+        href = urljoin(spec.base_url, raw_href or "")
 
         if not (title or brand or price_text):
             continue
@@ -47,15 +84,25 @@ def parse_sel_products(spec: SelScraper, d, w) -> List[Product]:
     return out
 
 
-def scrape_sel(site: int, url: str, timeout: int = 12) -> List[Product]:
+def scrape_sel(site: int, url: str, timeout: int = 12, scroll_steps: int = 0) -> List[Product]:
     spec = SEL_SCRAPERS[site]
-    d, w = open_browser(timeout)
+    site = spec.website
+    with stage(site, "browser_start"):
+        d, w = open_browser(timeout, profile=spec.browser)
     try:
-        try:
-            d.get(url)
-            return parse_sel_products(spec, d, w)
-        except Exception as e:
-            logger.error(f"[{spec.website}] scrape_sel failed: {e}", exc_info=True)
+        with stage(site, "navigate"):
+            # replay modunda arşivdeki sayfa yerel replay sunucusundan yüklenir
+            d.get(replay_url(url, spec) if replaying() else url)
+        ready = wait_for_items(d, site, spec.item_sel, spec.ready, timeout)
+        if ready.count == 0:
             return []
+        if scroll_steps and not replaying():
+            with stage(site, "scroll"):
+                scroll_for_items(d, spec.item_sel, scroll_steps)
+        if recording():
+            with stage(site, "page_source"):
+                record_page(url, spec, d.page_source)
+        with stage(site, "extract"):
+            return parse_sel_products(spec, d)
     finally:
         close_browser(d)
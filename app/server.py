@@ -1,45 +1,84 @@
 import csv
-import io
-from urllib.parse import quote
-
-from flask import Flask, request, render_template, Response
-from typing import List, Dict, Any
+import heapq
+import json
+import queue
 import time
+import zlib
+from urllib.parse import quote
 
-from app.scrapers.bs4_scraper import scrape_bs4
-from app.scrapers.sel_scraper import scrape_sel
-from app.utils.url_composer import load_websites, build_url
+from flask import Flask, request, render_template, Response, jsonify, g
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from app.scrapers.collector import collect_all_products, iter_site_results
+from app.utils.cache import (CACHE_REFRESH_MIN_AGE, CACHE_SOFT_TTL, CACHE_TTL, CacheBackend, make_cache,
+                             canonical_query)
+from app.utils.circuit_breaker import breaker_states
+from app.utils.driver_pool import pool_stats
+from app.utils.jobs import Job, JobQueue
+from app.utils.metrics import (REGISTRY, CACHE_REQUESTS_TOTAL, CACHE_STATE, DRIVER_POOL_DRIVERS,
+                               HTTP_REQUEST_SECONDS, JOB_QUEUE_DEPTH)
+from app.utils.url_composer import load_websites
+from app.utils.prewarm import PREWARM_ENABLED, BackgroundRefresher, Prewarmer, QueryPopularity
 from app.utils.product import Product
+from app.utils.readiness import wait_stats
+from app.utils.result_index import IndexCache, IndexedEntry, ResultIndex
+from app.utils.singleflight import SingleFlight
 
 from app.utils.log_config import logger
 
 app = Flask(__name__)
 WEBSITES = load_websites("data/websites.json")
-
-SCRAPER_MAP = {
-    "trendyol": {"func": scrape_bs4, "index": 0},
-    "hepsiburada": {"func": scrape_sel, "index": 0},
-    "amazon": {"func": scrape_bs4, "index": 1},
-    "n11": {"func": scrape_bs4, "index": 2},
-}
+TOP_N = 5
 
 # ---- CACHE ----
-CACHE: Dict[str, Dict[str, Any]] = {}
-CACHE_MAX_KEYS = 30
-
-
-def cache_get(query: str):
-    ent = CACHE.get(query)
-    if not ent:
+CACHE: CacheBackend = make_cache()
+QUERY_FLIGHTS = SingleFlight()
+POPULARITY = QueryPopularity()
+REFRESHER = BackgroundRefresher()
+# Cache kaydı başına bir kez kurulan ResultIndex'ler; filtreli tekrarlar listeyi yeniden gruplamaz
+INDEXES = IndexCache()
+
+
+def lookup_entry(key: str) -> Optional[IndexedEntry]:
+    # Önce süreç içi index; yoksa ya da soft TTL geçmişse backend okunur
+    # (başka bir süreç kaydı yenilemiş olabilir) ve index yalnızca kayıt değiştiyse kurulur.
+    ent = INDEXES.get(key)
+    if ent is not None and ent.age < CACHE_SOFT_TTL:
+        return ent
+    stored = CACHE.get_entry(key)
+    if stored is None or (ent is not None and stored.stored <= ent.stored):
+        return ent
+    return INDEXES.put(key, ResultIndex(stored.items), stored.stored, stored.expires)
+
+
+def cache_lookup(query: str, refresh: bool = False, count: bool = True) -> Optional[ResultIndex]:
+    # Soft TTL'i geçmiş kayıt beklemeden sunulur, yenilemesi arka plana atılır.
+    key = canonical_query(query)
+    if count:
+        POPULARITY.hit(key, query)
+    ent = lookup_entry(key)
+    if ent is None:
+        CACHE_REQUESTS_TOTAL.inc(result="miss")
+        return None
+    if refresh and ent.age >= CACHE_REFRESH_MIN_AGE:
+        CACHE_REQUESTS_TOTAL.inc(result="refresh")
         return None
-    return ent["data"]
+    if ent.age >= CACHE_SOFT_TTL:
+        CACHE_REQUESTS_TOTAL.inc(result="stale")
+        REFRESHER.submit(key, refresh_query, query)
+    else:
+        CACHE_REQUESTS_TOTAL.inc(result="hit")
+    return ent.index
 
 
-def cache_set(query: str, items: List[Product]) -> None:
-    if len(CACHE) >= CACHE_MAX_KEYS:
-        oldest_key = min(CACHE, key=lambda k: CACHE[k]["ts"])
-        CACHE.pop(oldest_key, None)
-    CACHE[query] = {"ts": time.time(), "data": items}
+def store_results(query: str, items: List[Product]) -> ResultIndex:
+    # Cache'e site bazında fiyat sıralı yazılır; kurulan index süreç içinde de tutulur
+    key = canonical_query(query)
+    index = ResultIndex(items)
+    now = time.time()
+    CACHE.set(key, index.items())
+    INDEXES.put(key, index, now, now + CACHE_TTL)
+    return index
 
 
 # --------------- filters ----------------
@@ -76,87 +115,128 @@ def filter_by_sites(items, allowed_sites: set[str]):
     return out
 
 
-# --------------- scrape ----------------
-def collect_all_products(websites, keywords: List[str]) -> List[Product]:
-    all_items: List[Product] = []
-    for w in websites:
-        url = build_url(w, keywords)
-        entry = SCRAPER_MAP.get(w.name.lower())
-        if not entry:
-            logger.error(f"[{w.name}] No scraper entry found in SCRAPER_MAP")
-            continue
-
-        func, idx = entry["func"], entry["index"]
-
-        try:
-            items: List[Product] = func(idx, url)
-        except Exception as e:
-            logger.error(f"[{w.name}] Scraper execution failed: {e}", exc_info=True)
-            continue
-
-        if not items:
-            logger.warning(f"[{w.name}] No items found.")
-            continue
-
-        all_items.extend(items)
-    return all_items
-
-
 def parse_request_params():
-    query   = request.args.get("q", "").strip()
-    ban_str = request.args.get("ban", "").strip()
-    refresh = request.args.get("refresh", "0") == "1"
+    # values: GET'te query string, POST /jobs'ta form alanları da okunur
+    query   = request.values.get("q", "").strip()
+    ban_str = request.values.get("ban", "").strip()
+    refresh = request.values.get("refresh", "0") == "1"
 
     keywords = query.split() if query else []
     bans     = ban_str.split() if ban_str else []
 
     all_sites = [w.name.lower() for w in WEBSITES]
-    user_touched = request.args.get("site_sel") == "1"
-    selected = request.args.getlist("site") if user_touched else all_sites
+    user_touched = request.values.get("site_sel") == "1"
+    selected = request.values.getlist("site") if user_touched else all_sites
     selected_set = set(s.lower() for s in selected)
 
     return query, ban_str, keywords, bans, refresh, selected_set
 
 
-def get_items_for_query(query: str, keywords, refresh: bool) -> List[Product]:
-    items = None if refresh else cache_get(query)
-    if items is None:
-        items = collect_all_products(WEBSITES, keywords)
-        items = include_by_keywords(items, keywords)
-        cache_set(query, items)
-    return items
+def scrape_query(query: str, keywords) -> ResultIndex:
+    items = collect_all_products(WEBSITES, keywords)
+    items = include_by_keywords(items, keywords)
+    return store_results(query, items)
 
 
-@app.get("/export")
-def export_csv():
-    query, ban_str, keywords, bans, refresh, selected_set = parse_request_params()
-    if not query:
-        return Response("Missing q", status=400)
+def refresh_query(query: str) -> ResultIndex:
+    # Aynı sorgu için eşzamanlı istekler tek bir taramayı paylaşır
+    return QUERY_FLIGHTS.do(canonical_query(query), scrape_query, query, query.split())
 
-    items = get_items_for_query(query, keywords, refresh)
-    items = filter_by_sites(items, selected_set)
-    items = exclude_by_keywords(items, bans)
-    items = sorted((p for p in items if p.price > 0), key=lambda p: p.price)
 
+def get_index_for_query(query: str, keywords, refresh: bool) -> ResultIndex:
+    index = cache_lookup(query, refresh)
+    if index is None:
+        index = refresh_query(query)
+    return index
+
+
+# Popüler sorgular süreleri dolmadan arka planda yeniden taranır
+PREWARMER = Prewarmer(POPULARITY, REFRESHER, CACHE.get_entry, refresh_query, CACHE_SOFT_TTL)
+
+
+def product_row(p: Product) -> dict:
+    return {"website": p.website, "name": p.name, "price_text": p.price_text, "price": p.price, "url": p.url}
+
+
+# --------------- export ----------------
+class _EchoWriter:
+    # csv.writer satırı bir yere yazmak yerine geri döndürsün diye
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(items: Iterable[Product]) -> Iterator[str]:
     # ---- Excel TR için CSV ----
-    sio = io.StringIO(newline="")
-    sio.write("\ufeff")  # BOM, bu sayede UTF-8 doğru açılır
+    yield "\ufeff"  # BOM, bu sayede UTF-8 doğru açılır
     writer = csv.writer(
-        sio,
+        _EchoWriter(),
         delimiter=";",  # Excel TR için semicolon
         lineterminator="\r\n",  # Windows için yeni line
         quoting=csv.QUOTE_MINIMAL
     )
 
-    writer.writerow(["#", "Name", "Price", "Website", "URL"])
+    yield writer.writerow(["#", "Name", "Price", "Website", "URL"])
+    for idx, p in enumerate(items, start=1):
+        yield writer.writerow([idx, p.name, p.price_text, p.website, p.url])
+
+
+def iter_ndjson(items: Iterable[Product]) -> Iterator[str]:
     for idx, p in enumerate(items, start=1):
-        writer.writerow([idx, p.name, p.price_text, p.website, p.url])
+        yield json.dumps({"#": idx, **product_row(p)}, ensure_ascii=False) + "\n"
+
+
+def iter_gzip(chunks: Iterable[str], flush_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    # Satırları biriktirip ~64KB'lık sıkıştırılmış parçalar halinde gönderir.
+    comp = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip header
+    buf: List[bytes] = []
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        buf.append(data)
+        size += len(data)
+        if size >= flush_bytes:
+            out = comp.compress(b"".join(buf))
+            buf, size = [], 0
+            if out:
+                yield out
+    yield comp.compress(b"".join(buf)) + comp.flush()
+
+
+# format -> (üretici, mimetype, dosya uzantısı)
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv; charset=utf-8", "csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson; charset=utf-8", "ndjson"),
+    "csv.gz": (lambda items: iter_gzip(iter_csv(items)), "application/gzip", "csv.gz"),
+}
+
+
+def logged_stream(chunks: Iterable, query: str) -> Iterator:
+    # Stream başladıktan sonraki hatalar Response oluşturulurken yakalanamaz
+    try:
+        yield from chunks
+    except Exception as e:
+        logger.error(f"Export failed for query='{query}': {e}", exc_info=True)
+        raise
+
+
+@app.get("/export")
+def export_csv():
+    query, ban_str, keywords, bans, refresh, selected_set = parse_request_params()
+    if not query:
+        return Response("Missing q", status=400)
 
-    filename = f"export_{quote(query)}.csv"
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        return Response(f"Unsupported format, use one of: {', '.join(EXPORT_FORMATS)}", status=400)
+    producer, mimetype, ext = EXPORT_FORMATS[fmt]
+
+    items = get_index_for_query(query, keywords, refresh).iter_sorted(selected_set, bans)
+
+    filename = f"export_{quote(query)}.{ext}"
     try:
         return Response(
-            sio.getvalue(),
-            mimetype="text/csv; charset=utf-8",
+            logged_stream(producer(items), query),
+            mimetype=mimetype,
             headers={"Content-Disposition": f'attachment; filename="{filename}"'},
         )
     except Exception as e:
@@ -164,6 +244,112 @@ def export_csv():
         return Response("Internal server error", status=500)
 
 
+# --------------- stream ----------------
+def iter_query_sites(query: str, keywords, refresh: bool) -> Iterator[Tuple[str, List[Product]]]:
+    # Cache'te varsa site site hemen verir, yoksa her site taraması bittikçe verir.
+    index = cache_lookup(query, refresh)
+    if index is not None:
+        for w in WEBSITES:
+            name = w.name.lower()
+            yield name, index.site_items(name)
+        return
+
+    by_site = {}
+    for w, site_items in iter_site_results(WEBSITES, keywords):
+        site_items = include_by_keywords(site_items, keywords)
+        by_site[w.name] = site_items
+        yield w.name.lower(), site_items
+
+    all_items: List[Product] = []
+    for w in WEBSITES:
+        all_items.extend(by_site.get(w.name, []))
+    store_results(query, all_items)
+
+
+def generate_stream(query: str, keywords, bans, refresh: bool, selected_set) -> Iterator[str]:
+    # NDJSON: her site için bir "site" satırı + güncel en ucuz N, en sonda "done".
+    top: List[Product] = []
+    total = 0
+    for site, site_items in iter_query_sites(query, keywords, refresh):
+        site_items = filter_by_sites(site_items, selected_set)
+        site_items = exclude_by_keywords(site_items, bans)
+        site_items = [p for p in site_items if p.price > 0]
+        total += len(site_items)
+        top = heapq.nsmallest(TOP_N, top + site_items, key=lambda p: p.price)
+        yield json.dumps({
+            "type": "site",
+            "website": site,
+            "count": len(site_items),
+            "top": [product_row(p) for p in top],
+        }, ensure_ascii=False) + "\n"
+    yield json.dumps({"type": "done", "total": total}) + "\n"
+
+
+@app.get("/stream")
+def stream():
+    query, ban_str, keywords, bans, refresh, selected_set = parse_request_params()
+    if not keywords:
+        return Response("Missing q", status=400)
+
+    return Response(
+        generate_stream(query, keywords, bans, refresh, selected_set),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --------------- jobs ----------------
+def run_job(job: Job) -> None:
+    # Job worker thread'inde çalışır; her site bittikçe sonuçlar işe eklenir
+    for site, site_items in iter_query_sites(job.query, job.query.split(), job.refresh):
+        job.add_site(site, site_items)
+
+
+JOBS = JobQueue(run_job)
+
+
+def job_response(job: Job, bans, selected_set) -> dict:
+    by_site = job.snapshot()
+    items: List[Product] = []
+    for site_items in by_site.values():
+        items.extend(site_items)
+    items = filter_by_sites(items, selected_set)
+    items = [p for p in exclude_by_keywords(items, bans) if p.price > 0]
+    return {
+        "id": job.id,
+        "status": job.status,
+        "query": job.query,
+        "sites": [{"website": site, "count": len(site_items)} for site, site_items in by_site.items()],
+        "total": len(items),
+        "top": [product_row(p) for p in heapq.nsmallest(TOP_N, items, key=lambda p: p.price)],
+        "error": job.error,
+    }
+
+
+@app.post("/jobs")
+def create_job():
+    query, ban_str, keywords, bans, refresh, selected_set = parse_request_params()
+    if not keywords:
+        return jsonify({"error": "Missing q"}), 400
+    try:
+        job = JOBS.submit(canonical_query(query), query, refresh)
+    except queue.Full:
+        logger.warning(f"[jobs] Queue full, rejecting query='{query}'")
+        return jsonify({"error": "Too many pending searches"}), 503, {"Retry-After": "5"}
+    url = f"/jobs/{job.id}"
+    return jsonify({"id": job.id, "status": job.status, "url": url}), 202, {"Location": url}
+
+
+@app.get("/jobs/<job_id>")
+def get_job(job_id: str):
+    # ban / site filtreleri okunurken uygulanır; aynı sorgunun işi farklı filtrelerle paylaşılabilir
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    _, _, _, bans, _, selected_set = parse_request_params()
+    return jsonify(job_response(job, bans, selected_set))
+
+
 # --------------- route ----------------
 @app.get("/")
 def home():
@@ -171,15 +357,74 @@ def home():
     if not keywords:
         return render_template("home.html")
 
-    items = get_items_for_query(query, keywords, refresh)
-    items = filter_by_sites(items, selected_set)
-    items = exclude_by_keywords(items, bans)
-    filtered = sorted((p for p in items if p.price > 0), key=lambda p: p.price)[:5]
+    # Cache'te yoksa popülerlik sayımı arama işi çalışırken yapılır, iki kez sayılmasın
+    index = cache_lookup(query, refresh, count=False)
+    if index is None:
+        # Cache'te yoksa sayfa hemen döner; arama iş kuyruğuna konur, sonuçlar site site sorgulanır
+        params = request.query_string.decode("utf-8")
+        return render_template("home.html", query=query, ban=ban_str, results=[], selected_sites=selected_set,
+                               jobs_url="/jobs?" + params, job_params=params)
+
+    POPULARITY.hit(canonical_query(query), query)
+    filtered = index.cheapest(TOP_N, selected_set, bans)
 
-    data = [{"website": p.website, "name": p.name, "price_text": p.price_text, "price": p.price, "url": p.url} for p in
-            filtered]
+    data = [product_row(p) for p in filtered]
     return render_template("home.html", query=query, ban=ban_str, results=data, selected_sites=selected_set)
 
 
+# --------------- metrics ----------------
+def collect_state_metrics() -> None:
+    # Cache ve sürücü havuzu anlık durumları /metrics okunurken gauge'lara yazılır
+    for k, v in CACHE.stats().items():
+        if k in ("keys", "bytes", "evictions"):
+            CACHE_STATE.set(v, stat=k)
+    for k, v in pool_stats().items():
+        DRIVER_POOL_DRIVERS.set(v, state=k)
+    JOB_QUEUE_DEPTH.set(JOBS.depth())
+
+
+REGISTRY.on_collect(collect_state_metrics)
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+    # İlk istekte başlar; debug reloader'ın ana süreci arka plan taraması yapmasın
+    if PREWARM_ENABLED:
+        PREWARMER.start()
+
+
+@app.after_request
+def observe_request(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        # Stream yanıtlarında bu süre ilk byte'a kadardır, tamamı değil
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, status=response.status_code)
+    return response
+
+
+@app.get("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.context_processor
+def inject_site_breakers():
+    # Devresi açık siteler arayüzde işaretlenir
+    return {"site_breakers": breaker_states()}
+
+
+@app.get("/stats/breakers")
+def breaker_stats():
+    return jsonify(breaker_states())
+
+
+@app.get("/stats/readiness")
+def readiness_stats():
+    # Site başına sayfa hazır olma bekleme süreleri; timeout ayarlarını gerçek veriye göre yapmak için
+    return jsonify(wait_stats())
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,240 @@
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.log_config import logger
+from app.utils.product import Product
+from app.utils.sqlite_utils import LocalConnections
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "sqlite")
+CACHE_PATH = os.environ.get("CACHE_PATH", "data/cache.sqlite3")
+CACHE_TTL = float(os.environ.get("CACHE_TTL", "900"))
+# Bu yaştan büyük kayıtlar hemen sunulur ama arka planda yenilenir (stale-while-revalidate)
+CACHE_SOFT_TTL = float(os.environ.get("CACHE_SOFT_TTL", "300"))
+# refresh=1 bu yaştan genç kayıtlar için yeniden tarama yapmaz (az önce ısıtılmış sonuç zaten taze)
+CACHE_REFRESH_MIN_AGE = float(os.environ.get("CACHE_REFRESH_MIN_AGE", "60"))
+# Sadece CACHE_BACKEND=memory için LRU byte bütçesi; sqlite kayıtları yalnızca TTL ile silinir
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+@dataclass
+class CacheEntry:
+    items: List[Product]
+    stored: float
+    expires: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored
+
+
+def canonical_query(query: str) -> str:
+    # "Iphone 15" ve "15  iphone" aynı anahtara düşsün
+    return " ".join(sorted(query.casefold().split()))
+
+
+# --------------- serialization ----------------
+def encode_products(items: List[Product]) -> bytes:
+    # Alan adları yerine sabit sıralı listeler + zlib: dataclass başına birkaç yüz byte tasarruf.
+    rows = [[p.website, p.name, p.price_text, p.price, p.url] for p in items]
+    return zlib.compress(json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_products(blob: bytes) -> List[Product]:
+    rows = json.loads(zlib.decompress(blob).decode("utf-8"))
+    return [Product(*row) for row in rows]
+
+
+def products_nbytes(items: List[Product]) -> int:
+    # Yaklaşık bellek kullanımı: liste + her Product nesnesi + string alanları
+    size = sys.getsizeof(items)
+    for p in items:
+        size += (sys.getsizeof(p) + sys.getsizeof(p.website) + sys.getsizeof(p.name)
+                 + sys.getsizeof(p.price_text) + sys.getsizeof(p.price) + sys.getsizeof(p.url))
+    return size
+
+
+# --------------- backends ----------------
+class CacheBackend:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[List[Product]]:
+        ent = self.get_entry(key)
+        return ent.items if ent else None
+
+    def set(self, key: str, items: List[Product], ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """LRU + TTL cache; get ve set O(1).
+
+    OrderedDict en son kullanılanı sona taşır, taşma olduğunda baştan
+    (en az kullanılan) silinir. Sınır kayıt sayısı değil, tahmini byte bütçesidir.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, ttl: float = CACHE_TTL):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.nbytes = 0
+        # key -> (expires, nbytes, items, stored)
+        self._data: "OrderedDict[str, Tuple[float, int, List[Product], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, int]:
+        out = super().stats()
+        with self._lock:
+            out.update(keys=len(self._data), bytes=self.nbytes)
+        return out
+
+    def _pop(self, key: str) -> None:
+        ent = self._data.pop(key, None)
+        if ent:
+            self.nbytes -= ent[1]
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            ent = self._data.get(key)
+            if ent is None:
+                self.misses += 1
+                return None
+            if ent[0] <= time.time():
+                self._pop(key)
+                self.misses += 1
+                self.evictions += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return CacheEntry(ent[2], ent[3], ent[0])
+
+    def set(self, key: str, items: List[Product], ttl: Optional[float] = None) -> None:
+        size = products_nbytes(items)
+        if size > self.max_bytes:
+            logger.warning(f"Cache entry for key='{key}' ({size} bytes) exceeds budget, not cached")
+            return
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (expires, size, items, now)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                oldest_key = next(iter(self._data))
+                self._pop(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+
+class SqliteCache(CacheBackend):
+    """Dosya tabanlı cache; aynı dosyayı kullanan tüm süreçler (gunicorn worker'ları) paylaşır."""
+
+    PURGE_EVERY = 100
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self._db = LocalConnections(path)
+        self._writes = 0
+        conn = self._db.conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " expires REAL NOT NULL,"
+            " data BLOB NOT NULL,"
+            " stored REAL NOT NULL DEFAULT 0)"
+        )
+        # Eski dosyalarda stored kolonu yok; 0 = yaşı bilinmiyor, ilk okumada yenilenir
+        cols = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+        if "stored" not in cols:
+            conn.execute("ALTER TABLE cache ADD COLUMN stored REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache(expires)")
+
+    def stats(self) -> Dict[str, int]:
+        # keys/bytes süresi dolmamış kayıtlar ve sıkıştırılmış veri boyutudur
+        out = super().stats()
+        try:
+            keys, nbytes = self._db.conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(length(data)), 0) FROM cache WHERE expires > ?", (time.time(),)
+            ).fetchone()
+            out.update(keys=keys, bytes=nbytes)
+        except Exception as e:
+            logger.error(f"Cache stats failed: {e}", exc_info=True)
+        return out
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        try:
+            row = self._db.conn().execute(
+                "SELECT data, stored, expires FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return CacheEntry(decode_products(row[0]), row[1], row[2])
+        except Exception as e:
+            logger.error(f"Cache read failed for key='{key}': {e}", exc_info=True)
+            return None
+
+    def set(self, key: str, items: List[Product], ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        try:
+            conn = self._db.conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires, data, stored) VALUES (?, ?, ?, ?)",
+                (key, expires, encode_products(items), now),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                cur = conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+                self.evictions += max(cur.rowcount, 0)
+        except Exception as e:
+            logger.error(f"Cache write failed for key='{key}': {e}", exc_info=True)
+
+    def delete(self, key: str) -> None:
+        self._db.conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._db.conn().execute("DELETE FROM cache")
+
+
+def make_cache(backend: str = CACHE_BACKEND) -> CacheBackend:
+    if backend == "sqlite":
+        try:
+            return SqliteCache()
+        except Exception as e:
+            logger.error(f"SQLite cache unavailable at {CACHE_PATH}, using memory cache: {e}", exc_info=True)
+    elif backend != "memory":
+        logger.warning(f"Unknown CACHE_BACKEND '{backend}', using memory cache")
+    return MemoryCache()
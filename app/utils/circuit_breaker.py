@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from typing import Dict
+
+from app.utils.log_config import logger
+from app.utils.metrics import SITE_BREAKER_STATE
+
+# Art arda bu kadar başarısız site taramasından (ilk sayfa hata ya da boş) sonra site devre dışı bırakılır
+BREAKER_THRESHOLD = int(os.environ.get("BREAKER_THRESHOLD", "5"))
+# Devre açıkken sitenin atlanacağı süre (saniye); sonra deneme taramasına izin verilir
+BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", "120"))
+# Yarı açık durumda aynı anda izin verilen deneme taraması
+BREAKER_PROBES = int(os.environ.get("BREAKER_PROBES", "1"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Site başına devre kesici.
+
+    closed: taramalar normal çalışır, ilk sayfası hata/boş dönen art arda site taramaları sayılır.
+    open: threshold'a ulaşınca cooldown boyunca tarama yapılmaz, site boş döner.
+    half_open: cooldown bitince en fazla `probes` deneme taramasına izin verilir;
+    biri sonuç getirirse devre kapanır, hata ya da boş dönerse yeniden açılır.
+    """
+
+    def __init__(self, site: str, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN,
+                 probes: int = BREAKER_PROBES):
+        self.site = site
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.probes = max(1, probes)
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = 0
+        self._lock = threading.Lock()
+        SITE_BREAKER_STATE.set(_STATE_VALUES[CLOSED], site=site)
+
+    def _set_state(self, state: str) -> None:
+        # _lock tutulurken çağrılır
+        self.state = state
+        SITE_BREAKER_STATE.set(_STATE_VALUES[state], site=self.site)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.time() - self.opened_at < self.cooldown:
+                    return False
+                self._set_state(HALF_OPEN)
+                self._probing = 0
+                logger.info(f"[{self.site}] Circuit half-open, sending probe scrape")
+            if self._probing >= self.probes:
+                return False
+            self._probing += 1
+            return True
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = max(0, self._probing - 1)
+            if ok:
+                if self.state != CLOSED:
+                    logger.info(f"[{self.site}] Circuit closed, probe returned results")
+                self.failures = 0
+                self._set_state(CLOSED)
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.threshold):
+                self.opened_at = time.time()
+                self._set_state(OPEN)
+                logger.warning(f"[{self.site}] Circuit open after {self.failures} consecutive failed or empty "
+                               f"scrapes, skipping site for {self.cooldown:g}s")
+
+    def cancel(self) -> None:
+        # allow() sonrası tarama hiç yapılmadıysa (ör. hız sınırı) deneme hakkı geri verilir
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = max(0, self._probing - 1)
+
+    def retry_in(self) -> float:
+        # Açık devrenin deneme taramasına kalan süre
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (time.time() - self.opened_at))
+
+    def snapshot(self) -> Dict[str, object]:
+        retry_in = self.retry_in()
+        with self._lock:
+            return {"state": self.state, "failures": self.failures, "retry_in": round(retry_in, 1)}
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(site: str) -> CircuitBreaker:
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(site)
+        if breaker is None:
+            breaker = _BREAKERS[site] = CircuitBreaker(site)
+        return breaker
+
+
+def breaker_states() -> Dict[str, Dict[str, object]]:
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.values())
+    return {b.site: b.snapshot() for b in breakers}
@@ -0,0 +1,254 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from selenium import webdriver
+
+from app.utils.log_config import logger
+from app.utils.scraper_models import BrowserProfile
+
+DRIVER_POOL_SIZE = int(os.environ.get("DRIVER_POOL_SIZE", "4"))
+DRIVER_MAX_USES = int(os.environ.get("DRIVER_MAX_USES", "50"))
+DRIVER_CHECKOUT_TIMEOUT = float(os.environ.get("DRIVER_CHECKOUT_TIMEOUT", "60"))
+# checkout boşta sürücü beklerken bu aralıkla yeni sürücü açılabilir mi diye tekrar bakar
+CHECKOUT_POLL = 0.5
+
+
+def new_driver(profile: Optional[BrowserProfile] = None) -> webdriver.Chrome:
+    profile = profile or BrowserProfile()
+    opts = webdriver.ChromeOptions()
+    if profile.headless:
+        opts.add_argument("--headless=new")
+    opts.page_load_strategy = profile.page_load_strategy
+    if profile.disable_images:
+        opts.add_argument("--blink-settings=imagesEnabled=false")
+        opts.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-dev-shm-usage")
+    opts.add_argument("--disable-extensions")
+    opts.add_argument("--mute-audio")
+    return webdriver.Chrome(options=opts)
+
+
+def block_urls(d, patterns: List[str]) -> None:
+    # Reklam / tracker / font gibi istekleri tarayıcı seviyesinde keser.
+    d.execute_cdp_cmd("Network.enable", {})
+    d.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+def visited_origins(d) -> Set[str]:
+    # Sekmenin gezinme geçmişindeki http(s) origin'leri (storage temizliği için)
+    urls = [e.get("url", "") for e in d.execute_cdp_cmd("Page.getNavigationHistory", {}).get("entries", [])]
+    urls.append(d.current_url)
+    origins = set()
+    for u in urls:
+        parts = urlsplit(u)
+        if parts.scheme in ("http", "https") and parts.netloc:
+            origins.add(f"{parts.scheme}://{parts.netloc}")
+    return origins
+
+
+def reset_driver(d) -> bool:
+    # Bir sonraki kullanıcıya temiz bir oturum bırak. Hata olursa sürücü bozuk sayılır.
+    # Havuz tüm sitelerce paylaşıldığı için storage gezilen her origin için ayrı temizlenir;
+    # localStorage.clear() yalnızca açık olan origin'i siler.
+    try:
+        handles = d.window_handles
+        origins: Set[str] = set()
+        for h in reversed(handles):
+            d.switch_to.window(h)
+            origins |= visited_origins(d)
+            if h != handles[0]:
+                d.close()
+        d.switch_to.window(handles[0])
+        for origin in origins:
+            d.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        d.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        d.execute_cdp_cmd("Network.clearBrowserCache", {})
+        d.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+        d.get("about:blank")
+        d.execute_cdp_cmd("Page.resetNavigationHistory", {})
+        return True
+    except Exception as e:
+        logger.warning(f"[driver_pool] Driver reset failed, discarding: {e}")
+        return False
+
+
+class PoolExhausted(TimeoutError):
+    # Süresi içinde boş sürücü yok: sitenin değil, bu sürecin kapasitesinin sorunu
+    pass
+
+
+class DriverPool:
+    """Sınırlı sayıda önceden başlatılmış Chrome sürücüsü tutar.
+
+    Sürücüler checkout() ile alınır, checkin() ile geri verilir. Geri
+    verilirken çerezler ve storage temizlenir; max_uses kullanımdan sonra
+    ya da reset başarısız olursa (çökme) sürücü kapatılıp yenisi açılır.
+    """
+
+    def __init__(self, size: int = DRIVER_POOL_SIZE, max_uses: int = DRIVER_MAX_USES,
+                 factory: Callable[[], webdriver.Chrome] = new_driver):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self._factory = factory
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._uses: Dict[int, int] = {}
+        self._live = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def owns(self, d) -> bool:
+        with self._lock:
+            return id(d) in self._uses
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if self._closed or self._live >= self.size:
+                return False
+            self._live += 1
+            return True
+
+    def _spawn(self):
+        # _reserve() ile yer ayrılmış olmalı
+        try:
+            d = self._factory()
+        except Exception:
+            with self._lock:
+                self._live -= 1
+            raise
+        with self._lock:
+            self._uses[id(d)] = 0
+        return d
+
+    def _discard(self, d) -> None:
+        with self._lock:
+            self._uses.pop(id(d), None)
+            self._live -= 1
+        try:
+            d.quit()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            live = self._live
+        return {"live": live, "idle": self._idle.qsize()}
+
+    def warm(self, n: Optional[int] = None) -> threading.Thread:
+        # Havuzu arka planda doldurur; ilk aramalar tarayıcı açılışını beklemez.
+        def run():
+            for _ in range(n if n is not None else self.size):
+                if not self._reserve():
+                    break
+                try:
+                    self._idle.put(self._spawn())
+                except Exception as e:
+                    logger.error(f"[driver_pool] Failed to pre-start driver: {e}", exc_info=True)
+                    break
+
+        t = threading.Thread(target=run, name="driver-pool-warm", daemon=True)
+        t.start()
+        return t
+
+    def checkout(self, timeout: float = DRIVER_CHECKOUT_TIMEOUT):
+        if self._closed:
+            raise RuntimeError("Driver pool is closed")
+        deadline = time.monotonic() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolExhausted(f"No driver available within {timeout:.0f}s")
+        try:
+            while True:
+                try:
+                    return self._idle.get_nowait()
+                except queue.Empty:
+                    pass
+                if self._reserve():
+                    return self._spawn()
+                # Havuz dolu ama boştaki sürücü henüz warm() tarafından hazırlanıyor; warm() açamazsa
+                # yeri serbest kalır ve bir sonraki turda _reserve() ile sürücü burada açılır
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise PoolExhausted(f"No driver available within {timeout:.0f}s")
+                try:
+                    return self._idle.get(timeout=min(left, CHECKOUT_POLL))
+                except queue.Empty:
+                    pass
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def checkin(self, d) -> None:
+        try:
+            with self._lock:
+                uses = self._uses.get(id(d), 0) + 1
+                self._uses[id(d)] = uses
+            if self._closed or uses >= self.max_uses or not reset_driver(d):
+                self._discard(d)
+            else:
+                self._idle.put(d)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def lease(self, timeout: float = DRIVER_CHECKOUT_TIMEOUT):
+        d = self.checkout(timeout)
+        try:
+            yield d
+        finally:
+            self.checkin(d)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                d = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(d)
+
+
+# Chrome başlatma ayarları (BrowserProfile.launch_key) başına bir havuz
+_POOLS: Dict[Tuple, DriverPool] = {}
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool(profile: Optional[BrowserProfile] = None) -> DriverPool:
+    profile = profile or BrowserProfile()
+    key = profile.launch_key()
+    with _POOL_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = DriverPool(factory=lambda: new_driver(profile))
+            pool.warm()
+            atexit.register(pool.close)
+        return pool
+
+
+def pool_stats() -> Dict[str, int]:
+    # Tüm havuzların toplam sürücü sayıları (metrikler için)
+    with _POOL_LOCK:
+        pools = list(_POOLS.values())
+    out = {"live": 0, "idle": 0}
+    for pool in pools:
+        for k, v in pool.stats().items():
+            out[k] += v
+    return out
+
+
+def release_driver(d) -> bool:
+    # Sürücü bir havuza aitse oraya geri verir.
+    with _POOL_LOCK:
+        pools = list(_POOLS.values())
+    for pool in pools:
+        if pool.owns(d):
+            pool.checkin(d)
+            return True
+    return False
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, quote, urlparse
+
+from app.utils.log_config import logger
+from app.utils.sqlite_utils import LocalConnections
+
+# live: bugünkü davranış, record: canlı çek + arşive yaz, replay: sadece arşivden oku
+FETCH_MODE = os.environ.get("FETCH_MODE", "live")
+ARCHIVE_PATH = os.environ.get("FETCH_ARCHIVE", "data/pages.sqlite3")
+
+# Sayfa içeriğinin yorumlanışını değiştirmeyen alanlar versiyona katılmaz
+_UNVERSIONED_FIELDS = {"browser", "ready", "parser", "fetch_mode", "transfer_mode"}
+
+
+def recording() -> bool:
+    return FETCH_MODE == "record"
+
+
+def replaying() -> bool:
+    return FETCH_MODE == "replay"
+
+
+def spec_version(spec) -> str:
+    # Seçiciler değişince eski kayıtlar eşleşmesin diye spec'in kısa özeti
+    fields = {k: v for k, v in asdict(spec).items() if k not in _UNVERSIONED_FIELDS}
+    raw = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+class PageArchive:
+    """URL + spec versiyonu ile anahtarlanmış, zlib sıkıştırılmış sayfa arşivi (SQLite)."""
+
+    def __init__(self, path: str = ARCHIVE_PATH):
+        self.path = path
+        self._db = LocalConnections(path)
+        self._db.conn().execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " spec_version TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " body BLOB NOT NULL)"
+        )
+
+    @staticmethod
+    def key(url: str, version: str) -> str:
+        return f"{version}:{url}"
+
+    def put(self, url: str, version: str, body: str) -> None:
+        self._db.conn().execute(
+            "INSERT OR REPLACE INTO pages (key, url, spec_version, fetched_at, body) VALUES (?, ?, ?, ?, ?)",
+            (self.key(url, version), url, version, time.time(), zlib.compress(body.encode("utf-8"), 6)),
+        )
+
+    def get_by_key(self, key: str) -> Optional[str]:
+        row = self._db.conn().execute("SELECT body FROM pages WHERE key = ?", (key,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def get(self, url: str, version: str) -> Optional[str]:
+        return self.get_by_key(self.key(url, version))
+
+
+_ARCHIVE: Optional[PageArchive] = None
+_ARCHIVE_LOCK = threading.Lock()
+
+
+def get_archive() -> PageArchive:
+    global _ARCHIVE
+    with _ARCHIVE_LOCK:
+        if _ARCHIVE is None:
+            _ARCHIVE = PageArchive()
+        return _ARCHIVE
+
+
+def record_page(url: str, spec, body: str) -> None:
+    if not recording():
+        return
+    try:
+        get_archive().put(url, spec_version(spec), body)
+    except Exception as e:
+        logger.error(f"[{spec.website}] Failed to record page {url}: {e}", exc_info=True)
+
+
+def replay_page(url: str, spec) -> Optional[str]:
+    body = get_archive().get(url, spec_version(spec))
+    if body is None:
+        logger.warning(f"[{spec.website}] No recorded page for {url} (spec {spec_version(spec)})")
+    return body
+
+
+# --------------- replay server ----------------
+# Tarayıcı gerektiren scraper'lar (JS ile okuma) için arşivdeki sayfayı yerelden sunar.
+# CSP tüm harici yüklemeleri ve sayfa script'lerini engeller; WebDriver'ın execute_script'i etkilenmez.
+REPLAY_CSP = "default-src 'none'; style-src 'unsafe-inline'"
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        key = parse_qs(urlparse(self.path).query).get("key", [""])[0]
+        body = get_archive().get_by_key(key) if key else None
+        if body is None:
+            self.send_error(404, "Not recorded")
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Content-Security-Policy", REPLAY_CSP)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_SERVER: Optional[ThreadingHTTPServer] = None
+
+
+def replay_url(url: str, spec) -> str:
+    global _SERVER
+    with _ARCHIVE_LOCK:
+        if _SERVER is None:
+            _SERVER = ThreadingHTTPServer(("127.0.0.1", 0), _ReplayHandler)
+            _SERVER.daemon_threads = True
+            threading.Thread(target=_SERVER.serve_forever, name="replay-server", daemon=True).start()
+            logger.info(f"Replay server listening on 127.0.0.1:{_SERVER.server_port}")
+        port = _SERVER.server_port
+    return f"http://127.0.0.1:{port}/page?key={quote(PageArchive.key(url, spec_version(spec)), safe='')}"
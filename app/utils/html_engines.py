@@ -0,0 +1,121 @@
+import os
+from typing import Any, Dict, List, Optional
+
+import soupsieve as sv
+from bs4 import BeautifulSoup, SoupStrainer
+
+from app.utils.log_config import logger
+
+HTML_PARSER = os.environ.get("HTML_PARSER", "html.parser")
+
+
+class HtmlEngine:
+    """parse_bs4_products'ın kullandığı küçük çıkarım arayüzü.
+
+    Seçiciler compile() ile bir kez derlenir; select/select_one derlenmiş
+    seçiciyi alır. text(), BeautifulSoup'un get_text(strip=True) davranışını
+    (her metin parçası kırpılıp boşluksuz birleştirilir) taklit etmelidir ki
+    her motor aynı Product çıktısını versin.
+    """
+    name = ""
+
+    def compile(self, selector: str) -> Any:
+        raise NotImplementedError
+
+    def parse(self, html: str, scope: Optional[SoupStrainer] = None) -> Any:
+        raise NotImplementedError
+
+    def select(self, node, compiled) -> List[Any]:
+        raise NotImplementedError
+
+    def select_one(self, node, compiled) -> Optional[Any]:
+        raise NotImplementedError
+
+    def text(self, node) -> str:
+        raise NotImplementedError
+
+    def attr(self, node, name: str) -> Optional[str]:
+        raise NotImplementedError
+
+
+class SoupEngine(HtmlEngine):
+    # BeautifulSoup + soupsieve; parser "html.parser" ya da "lxml"
+    def __init__(self, parser: str = "html.parser"):
+        self.name = parser
+        self.parser = parser
+
+    def compile(self, selector: str):
+        return sv.compile(selector)
+
+    def parse(self, html: str, scope: Optional[SoupStrainer] = None) -> BeautifulSoup:
+        return BeautifulSoup(html, self.parser, parse_only=scope)
+
+    def select(self, node, compiled):
+        return compiled.select(node)
+
+    def select_one(self, node, compiled):
+        return compiled.select_one(node)
+
+    def text(self, node) -> str:
+        return node.get_text(strip=True) if node is not None else ""
+
+    def attr(self, node, name: str) -> Optional[str]:
+        value = node.get(name)
+        if isinstance(value, list):
+            return " ".join(value)
+        return value
+
+
+class SelectolaxEngine(HtmlEngine):
+    # selectolax (lexbor): C ile yazılmış parser + CSS motoru, scope gerektirmez
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def compile(self, selector: str) -> str:
+        # lexbor seçicileri kendi içinde önbelleğe alır; sözdizimini burada doğrula
+        self._parser("<html></html>").css(selector)
+        return selector
+
+    def parse(self, html: str, scope: Optional[SoupStrainer] = None):
+        return self._parser(html)
+
+    def select(self, node, compiled: str):
+        return node.css(compiled)
+
+    def select_one(self, node, compiled: str):
+        return node.css_first(compiled)
+
+    def text(self, node) -> str:
+        return node.text(deep=True, separator="", strip=True) if node is not None else ""
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.attributes.get(name)
+
+
+_ENGINES: Dict[str, HtmlEngine] = {}
+
+
+def _make_engine(name: str) -> HtmlEngine:
+    if name == "selectolax":
+        return SelectolaxEngine()
+    if name == "lxml":
+        import lxml  # noqa: F401  (yoksa ImportError -> html.parser'a düş)
+        return SoupEngine("lxml")
+    if name != "html.parser":
+        raise ValueError(f"Unknown HTML parser '{name}'")
+    return SoupEngine("html.parser")
+
+
+def get_engine(name: Optional[str] = None) -> HtmlEngine:
+    # İstenen motor kurulu değilse html.parser ile devam edilir.
+    name = name or HTML_PARSER
+    if name not in _ENGINES:
+        try:
+            _ENGINES[name] = _make_engine(name)
+        except Exception as e:
+            logger.warning(f"HTML parser '{name}' unavailable, using html.parser: {e}")
+            _ENGINES[name] = get_engine("html.parser") if name != "html.parser" else SoupEngine()
+    return _ENGINES[name]
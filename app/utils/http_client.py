@@ -0,0 +1,41 @@
+import os
+
+import urllib3
+
+from app.utils.log_config import logger
+
+# Tek bir PoolManager: aynı hosta yapılan istekler keep-alive bağlantıları paylaşır.
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "8"))
+
+DEFAULT_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+HTTP = urllib3.PoolManager(
+    num_pools=16,
+    maxsize=HTTP_POOL_MAXSIZE,
+    block=False,
+    headers=DEFAULT_HEADERS,
+    retries=urllib3.Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+)
+
+
+def fetch_html(url: str, timeout: float = 12) -> str:
+    # Sayfayı tarayıcı açmadan indirir. 4xx/5xx durumunda hata fırlatır.
+    r = HTTP.request("GET", url, timeout=urllib3.Timeout(connect=min(5.0, timeout), read=timeout))
+    if r.status >= 400:
+        raise urllib3.exceptions.HTTPError(f"GET {url} returned HTTP {r.status}")
+
+    charset = "utf-8"
+    content_type = r.headers.get("Content-Type", "")
+    if "charset=" in content_type:
+        charset = content_type.split("charset=", 1)[1].split(";", 1)[0].strip() or charset
+    try:
+        return r.data.decode(charset, errors="replace")
+    except LookupError:
+        logger.warning(f"Unknown charset '{charset}' for {url}, decoding as utf-8")
+        return r.data.decode("utf-8", errors="replace")
@@ -0,0 +1,121 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from app.utils.log_config import logger
+from app.utils.metrics import JOBS_TOTAL
+from app.utils.product import Product
+
+# Aynı anda çalışan arama işi sayısı; her iş kendi içinde siteleri paralel tarar
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# Kuyrukta bekleyebilecek en fazla iş; dolunca yeni işler reddedilir (503)
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "50"))
+# Biten işler bu kadar saniye sorgulanabilir kalır
+JOB_KEEP_SECONDS = float(os.environ.get("JOB_KEEP_SECONDS", "600"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+@dataclass
+class Job:
+    id: str
+    key: str
+    query: str
+    refresh: bool = False
+    status: str = QUEUED
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+    # site -> ürünler, sitelerin bitiş sırasıyla
+    by_site: Dict[str, List[Product]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_site(self, site: str, items: List[Product]) -> None:
+        with self._lock:
+            self.by_site[site] = items
+
+    def snapshot(self) -> Dict[str, List[Product]]:
+        # İş çalışırken okunabilsin diye kopya döner
+        with self._lock:
+            return dict(self.by_site)
+
+
+class JobQueue:
+    """Arama işleri için sınırlı kuyruk + sabit sayıda worker thread.
+
+    Web istekleri yalnızca işi kuyruğa koyar ve id döner; tarayıcı işi
+    JOB_WORKERS thread'inde yapılır. Aynı sorgu için bekleyen ya da çalışan
+    bir iş varsa yenisi açılmaz, mevcut iş döner.
+    """
+
+    def __init__(self, runner: Callable[[Job], None], workers: int = JOB_WORKERS,
+                 max_queue: int = JOB_QUEUE_SIZE, keep_seconds: float = JOB_KEEP_SECONDS):
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.keep_seconds = keep_seconds
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=max(1, max_queue))
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[str, Job] = {}  # key -> bitmemiş iş
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, key: str, query: str, refresh: bool = False) -> Job:
+        # Kuyruk doluysa queue.Full fırlatır
+        self.start()
+        with self._lock:
+            self._prune()
+            job = self._active.get(key)
+            if job is not None and not refresh:
+                return job
+            job = Job(id=uuid.uuid4().hex, key=key, query=query, refresh=refresh)
+            self._queue.put_nowait(job)
+            self._jobs[job.id] = job
+            self._active[key] = job
+        JOBS_TOTAL.inc(status=QUEUED)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        # _lock tutulurken çağrılır
+        cutoff = time.time() - self.keep_seconds
+        old = [jid for jid, j in self._jobs.items() if j.finished is not None and j.finished < cutoff]
+        for jid in old:
+            del self._jobs[jid]
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            job.status, job.started = RUNNING, time.time()
+            try:
+                self.runner(job)
+                job.status = DONE
+            except Exception as e:
+                logger.error(f"[jobs] Job {job.id} for query='{job.query}' failed: {e}", exc_info=True)
+                job.status, job.error = FAILED, str(e)
+            finally:
+                job.finished = time.time()
+                with self._lock:
+                    if self._active.get(job.key) is job:
+                        del self._active[job.key]
+                JOBS_TOTAL.inc(status=job.status)
+                self._queue.task_done()
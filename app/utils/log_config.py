@@ -1,19 +1,124 @@
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Dict, Tuple
 
 Path("logs").mkdir(exist_ok=True)
 
 logging.getLogger("werkzeug").propagate = False
 
-LOG_FILE = "logs/app.log"
+# Her süreç kendi dosyasına yazar: gunicorn worker'ları ve worker.py aynı dosyayı
+# döndürürse birinin rotasyonu diğerlerinin yazdıklarını keser
+LOG_FILE = os.getenv("LOG_FILE") or f"logs/app-{os.getpid()}.log"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+# Dosya kayıtları JSON satırı; LOG_JSON=0 ile eski düz metin formatına dönülür
+LOG_JSON = os.getenv("LOG_JSON", "1") != "0"
+# rate_key taşıyan kayıtlar için: pencere başına anahtar başına izin verilen kayıt sayısı
+LOG_RATE_WINDOW = float(os.getenv("LOG_RATE_WINDOW", "60"))
+LOG_RATE_BURST = int(os.getenv("LOG_RATE_BURST", "5"))
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding="utf-8", mode = "w"),
-        logging.StreamHandler()
-    ]
-)
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 
-logger = logging.getLogger("WebScraper")
\ No newline at end of file
+# LogRecord'un standart alanları; bunların dışındakiler extra={...} ile gelmiştir
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "rate_key"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for k, v in vars(record).items():
+            if k not in _RESERVED and not k.startswith("_"):
+                out[k] = v
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """extra={"rate_key": ...} taşıyan kayıtları anahtar başına sınırlar.
+
+    Her pencerede ilk LOG_RATE_BURST kayıt geçer, gerisi sayılıp düşürülür;
+    sonraki pencerenin ilk kaydına bastırılan sayı "suppressed" olarak eklenir.
+    Anahtarı olmayan kayıtlar hiç etkilenmez.
+    """
+
+    def __init__(self, window: float = LOG_RATE_WINDOW, burst: int = LOG_RATE_BURST):
+        super().__init__()
+        self.window = window
+        self.burst = max(1, burst)
+        # rate_key -> (pencere başlangıcı, pencerede geçen, bastırılan)
+        self._state: Dict[str, Tuple[float, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rate_key", None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            start, passed, dropped = self._state.get(key, (now, 0, 0))
+            if now - start >= self.window:
+                start, passed = now, 0
+            if passed >= self.burst:
+                self._state[key] = (start, passed, dropped + 1)
+                return False
+            self._state[key] = (start, passed + 1, 0)
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+class _PreparedQueueHandler(QueueHandler):
+    # Mesaj ve traceback çağıran thread'de metne çevrilir (args değişebilir),
+    # biçimlendirme ve disk I/O listener thread'inde yapılır.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _setup() -> QueueListener:
+    file_handler = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter() if LOG_JSON else logging.Formatter(TEXT_FORMAT))
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    queue_handler = _PreparedQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.handlers[:] = [queue_handler]
+
+    listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    # Çıkışta kuyrukta kalan kayıtlar diske yazılır
+    atexit.register(listener.stop)
+    return listener
+
+
+LISTENER = _setup()
+
+logger = logging.getLogger("WebScraper")
@@ -0,0 +1,206 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        # Blok boyunca değeri bir artırır (ör. devam eden taramalar)
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket sayıları..., +Inf], toplam
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[idx] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(c), self._sums[k]) for k, c in self._counts.items()]
+        lines = self.header()
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="%s"' % _num(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._hooks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def on_collect(self, hook: Callable[[], None]) -> None:
+        # /metrics okunmadan hemen önce çalışır; dış durumdan gauge doldurmak için
+        with self._lock:
+            self._hooks.append(hook)
+
+    def render(self) -> str:
+        with self._lock:
+            hooks, metrics = list(self._hooks), list(self._metrics)
+        for hook in hooks:
+            hook()
+        lines: List[str] = []
+        for m in metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, doc: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, doc, labelnames))
+
+
+def gauge(name: str, doc: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, doc, labelnames))
+
+
+def histogram(name: str, doc: str, labelnames: Sequence[str] = (),
+              buckets: Optional[Sequence[float]] = None) -> Histogram:
+    return REGISTRY.register(Histogram(name, doc, labelnames, buckets or DEFAULT_BUCKETS))
+
+
+# --------------- uygulama metrikleri ----------------
+SCRAPE_STAGE_SECONDS = histogram(
+    "webscraper_scrape_stage_seconds",
+    "Time spent per scrape stage (browser_start, navigate, cookies, readiness, page_source, extract, http_fetch, parse)",
+    ("site", "stage"),
+)
+SCRAPE_SECONDS = histogram("webscraper_scrape_seconds", "Total time to scrape one site page", ("site",))
+SCRAPES_TOTAL = counter("webscraper_scrapes_total", "Site page scrapes by outcome (ok, empty, error, skipped, throttled)",
+                        ("site", "outcome"))
+SCRAPE_PRODUCTS_TOTAL = counter("webscraper_scrape_products_total", "Products returned by scrapers", ("site",))
+SCRAPES_IN_FLIGHT = gauge("webscraper_scrapes_in_flight", "Site page scrapes currently running", ("site",))
+READINESS_TOTAL = counter("webscraper_readiness_total", "Readiness wait outcomes", ("site", "outcome"))
+CACHE_REQUESTS_TOTAL = counter("webscraper_cache_requests_total",
+                               "Result cache lookups (hit, stale, miss, refresh)", ("result",))
+CACHE_REFRESHES_TOTAL = counter("webscraper_cache_refreshes_total", "Background query refreshes",
+                                ("reason", "outcome"))
+HTTP_REQUEST_SECONDS = histogram("webscraper_http_request_seconds", "Flask request latency",
+                                 ("route", "status"))
+SITE_QUEUE_WAIT_SECONDS = histogram("webscraper_site_queue_wait_seconds",
+                                    "Time a page scrape waited for a site session slot and rate-limit token",
+                                    ("site",))
+SITE_QUEUE_WAITING = gauge("webscraper_site_queue_waiting", "Page scrapes waiting for a site slot", ("site",))
+SITE_BREAKER_STATE = gauge("webscraper_site_breaker_state", "Site circuit breaker (0 closed, 1 half-open, 2 open)",
+                           ("site",))
+JOBS_TOTAL = counter("webscraper_jobs_total", "Search job state transitions (queued, done, failed)", ("status",))
+JOB_QUEUE_DEPTH = gauge("webscraper_job_queue_depth", "Search jobs waiting for a worker")
+CACHE_STATE = gauge("webscraper_cache", "Result cache backend state (keys, bytes, evictions)", ("stat",))
+DRIVER_POOL_DRIVERS = gauge("webscraper_driver_pool_drivers", "Pooled Chrome drivers (live, idle)", ("state",))
+
+
+def stage(site: str, name: str):
+    # with stage(spec.website, "navigate"): ...
+    return SCRAPE_STAGE_SECONDS.time(site=site, stage=name)
@@ -0,0 +1,151 @@
+import heapq
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.utils.cache import CacheEntry
+from app.utils.log_config import logger
+from app.utils.metrics import CACHE_REFRESHES_TOTAL
+
+REFRESH_WORKERS = int(os.environ.get("REFRESH_WORKERS", "1"))
+POPULARITY_HALF_LIFE = float(os.environ.get("POPULARITY_HALF_LIFE", "3600"))
+POPULARITY_MAX_KEYS = int(os.environ.get("POPULARITY_MAX_KEYS", "1000"))
+PREWARM_ENABLED = os.environ.get("PREWARM_ENABLED", "1") != "0"
+PREWARM_TOP_K = int(os.environ.get("PREWARM_TOP_K", "10"))
+PREWARM_INTERVAL = float(os.environ.get("PREWARM_INTERVAL", "60"))
+# Tek seferlik aramalar ısıtılmasın diye gereken minimum (zamanla sönümlenen) arama sayısı
+PREWARM_MIN_SCORE = float(os.environ.get("PREWARM_MIN_SCORE", "2"))
+
+
+class QueryPopularity:
+    """Sorgu başına üstel sönümlenen arama sayısı.
+
+    Skor her POPULARITY_HALF_LIFE saniyede yarıya iner; böylece eskiden
+    popüler olan sorgular zamanla yerini yenilerine bırakır. Bellek
+    POPULARITY_MAX_KEYS anahtarla sınırlıdır, taşınca en düşük skorlular atılır.
+    """
+
+    def __init__(self, half_life: float = POPULARITY_HALF_LIFE, max_keys: int = POPULARITY_MAX_KEYS):
+        self.half_life = half_life
+        self.max_keys = max(1, max_keys)
+        # key -> (skor, skorun hesaplandığı an, son görülen ham sorgu)
+        self._scores: Dict[str, Tuple[float, float, str]] = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, score: float, at: float, now: float) -> float:
+        return score * math.pow(0.5, (now - at) / self.half_life)
+
+    def hit(self, key: str, query: str) -> None:
+        now = time.time()
+        with self._lock:
+            score, at, _ = self._scores.get(key, (0.0, now, query))
+            self._scores[key] = (self._decayed(score, at, now) + 1, now, query)
+            if len(self._scores) > self.max_keys + self.max_keys // 4:
+                keep = heapq.nlargest(self.max_keys, self._scores.items(),
+                                      key=lambda kv: self._decayed(kv[1][0], kv[1][1], now))
+                self._scores = dict(keep)
+
+    def top(self, k: int) -> List[Tuple[str, str, float]]:
+        # (key, ham sorgu, güncel skor), skora göre azalan
+        now = time.time()
+        with self._lock:
+            rows = [(key, q, self._decayed(s, at, now)) for key, (s, at, q) in self._scores.items()]
+        return heapq.nlargest(k, rows, key=lambda r: r[2])
+
+
+class BackgroundRefresher:
+    """Sorguları istek thread'i dışında yeniden tarar.
+
+    Aynı anahtar kuyrukta ya da çalışır durumdayken tekrar eklenmez; worker
+    sayısı küçük tutulur ki arka plan işleri tarayıcı havuzunu doldurmasın.
+    """
+
+    def __init__(self, workers: int = REFRESH_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="cache-refresh")
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, key: str, fn: Callable[..., object], *args, reason: str = "stale") -> bool:
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+
+        def run():
+            outcome = "error"
+            try:
+                fn(*args)
+                outcome = "ok"
+            except Exception as e:
+                logger.error(f"Background refresh failed for key='{key}': {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                CACHE_REFRESHES_TOTAL.inc(reason=reason, outcome=outcome)
+
+        self._pool.submit(run)
+        return True
+
+
+class Prewarmer:
+    """En popüler PREWARM_TOP_K sorguyu süreleri dolmadan yeniden tarar.
+
+    Her PREWARM_INTERVAL saniyede bir, cache'te olmayan ya da soft TTL'i bir
+    sonraki kontrolden önce dolacak popüler sorgular BackgroundRefresher
+    kuyruğuna eklenir; böylece popüler sorgular hiç bayat gösterilmez.
+    """
+
+    def __init__(self, popularity: QueryPopularity, refresher: BackgroundRefresher,
+                 lookup: Callable[[str], Optional[CacheEntry]], refresh_fn: Callable[[str], object],
+                 soft_ttl: float, top_k: int = PREWARM_TOP_K, interval: float = PREWARM_INTERVAL,
+                 min_score: float = PREWARM_MIN_SCORE):
+        self.popularity = popularity
+        self.refresher = refresher
+        self.lookup = lookup
+        self.refresh_fn = refresh_fn
+        self.soft_ttl = soft_ttl
+        self.top_k = top_k
+        self.interval = interval
+        self.min_score = min_score
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def run_once(self) -> int:
+        queued = 0
+        for key, query, score in self.popularity.top(self.top_k):
+            if score < self.min_score:
+                break
+            ent = self.lookup(key)
+            # Sonraki tura kadar taze kalacaksa beklenir
+            if ent is not None and ent.age < self.soft_ttl - self.interval:
+                continue
+            if self.refresher.submit(key, self.refresh_fn, query, reason="prewarm"):
+                queued += 1
+        if queued:
+            logger.info(f"[prewarm] Queued {queued} popular queries for refresh")
+        return queued
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"[prewarm] Cycle failed: {e}", exc_info=True)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name="cache-prewarm", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -8,5 +8,6 @@ def parse_price_to_int(price_text: str) -> int:
         digits = re.sub(r"[^\d]", "", price_text)
         return int(digits) if digits else 0
     except Exception as e:
-        logger.error(f"Price parse failed for text='{price_text}': {e}", exc_info=True)
+        logger.error(f"Price parse failed for text='{price_text}': {e}", exc_info=True,
+                     extra={"rate_key": "price_parse"})
         return -1
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+from app.utils.log_config import logger
+
+# Tek round trip: [item sayısı, "sonuç yok" elemanı var mı]
+READY_PROBE_JS = """
+const [itemSel, noResultsSel] = arguments;
+return [
+    document.querySelectorAll(itemSel).length,
+    noResultsSel ? document.querySelector(noResultsSel) !== null : false,
+];
+"""
+
+WAIT_HISTORY = 200
+
+
+@dataclass
+class ReadyResult:
+    # outcome: "ready" | "no_results" | "timeout"
+    outcome: str
+    count: int
+    elapsed: float
+
+
+def wait_ready(d, item_sel: str, min_items: int = 1, stable_ms: int = 0,
+               no_results_sel: Optional[str] = None, timeout: float = 12, poll_ms: int = 100,
+               sparse_ms: Optional[int] = None) -> ReadyResult:
+    """Sonuç ızgarası hazır olana kadar bekler.
+
+    Hazır: en az min_items kart var ve kart sayısı stable_ms boyunca değişmedi.
+    min_items yumuşak bir hedeftir: daha az (ama sıfırdan fazla) kart sparse_ms
+    boyunca (varsayılan 2 * stable_ms) değişmezse dar bir aramanın tüm sonuçları
+    gelmiş sayılır. no_results_sel görünürse ve hiç kart yoksa hemen döner.
+    Süre dolarsa o ana kadar bulunan kart sayısıyla "timeout" döner (hata fırlatmaz).
+    """
+    sparse_ms = 2 * stable_ms if sparse_ms is None else sparse_ms
+    start = time.monotonic()
+    last_count = -1
+    stable_since = start
+    count = 0
+    while True:
+        now = time.monotonic()
+        count, no_results = d.execute_script(READY_PROBE_JS, item_sel, no_results_sel)
+        if count == 0 and no_results:
+            return ReadyResult("no_results", 0, now - start)
+
+        if count != last_count:
+            last_count = count
+            stable_since = now
+        stable_for = (now - stable_since) * 1000
+        if count >= min_items and stable_for >= stable_ms:
+            return ReadyResult("ready", count, now - start)
+        if 0 < count < min_items and stable_for >= sparse_ms:
+            return ReadyResult("ready", count, now - start)
+
+        if now - start >= timeout:
+            return ReadyResult("timeout", count, now - start)
+        time.sleep(poll_ms / 1000)
+
+
+# ---- bekleme süresi kayıtları (timeout ayarı için) ----
+_WAITS: Dict[str, Deque[ReadyResult]] = defaultdict(lambda: deque(maxlen=WAIT_HISTORY))
+_WAITS_LOCK = threading.Lock()
+
+
+def record_wait(site: str, result: ReadyResult) -> None:
+    with _WAITS_LOCK:
+        _WAITS[site].append(result)
+    logger.info(f"[{site}] readiness {result.outcome} after {result.elapsed:.2f}s ({result.count} items)")
+
+
+def wait_stats() -> Dict[str, Dict[str, float]]:
+    # Site başına son WAIT_HISTORY bekleme: sayılar, ortalama, p50, p95, max (saniye)
+    out: Dict[str, Dict[str, float]] = {}
+    with _WAITS_LOCK:
+        snapshot = {site: list(waits) for site, waits in _WAITS.items()}
+    for site, waits in snapshot.items():
+        times: List[float] = sorted(r.elapsed for r in waits)
+        n = len(times)
+        out[site] = {
+            "count": n,
+            "timeouts": sum(1 for r in waits if r.outcome == "timeout"),
+            "no_results": sum(1 for r in waits if r.outcome == "no_results"),
+            "avg": sum(times) / n,
+            "p50": times[n // 2],
+            "p95": times[min(n - 1, int(n * 0.95))],
+            "max": times[-1],
+        }
+    return out
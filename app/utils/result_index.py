@@ -0,0 +1,102 @@
+import heapq
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import islice
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.utils.product import Product
+
+_price = attrgetter("price")
+
+# Süreç içinde index'i tutulan en fazla sorgu sayısı
+INDEX_CACHE_SIZE = int(os.environ.get("INDEX_CACHE_SIZE", "256"))
+
+
+class ResultIndex:
+    """Bir sorgunun sonuçlarını site bazında fiyata göre sıralı tutar.
+
+    Site filtresi sadece seçili sitelerin listelerini heapq.merge ile
+    birleştirir; "en ucuz N" ise birleşik akışı baştan tarayıp N ürün
+    bulunca durur, her istekte tüm listeyi sıralamaya gerek kalmaz.
+    """
+
+    def __init__(self, items: Iterable[Product]):
+        priced: Dict[str, List[Product]] = {}
+        unpriced: Dict[str, List[Product]] = {}
+        for p in items:
+            (priced if p.price > 0 else unpriced).setdefault(p.website, []).append(p)
+        # items() çıktısı zaten sıralı olduğundan tekrar kurulurken sort O(n) çalışır
+        self.by_site: Dict[str, List[Product]] = {site: sorted(ps, key=_price) for site, ps in priced.items()}
+        self.unpriced = unpriced
+
+    def items(self) -> List[Product]:
+        # Cache'e yazılacak sıra: her site için fiyatlı ürünler artan fiyatla, sonra fiyatsızlar.
+        out: List[Product] = []
+        for site in dict.fromkeys([*self.by_site, *self.unpriced]):
+            out.extend(self.by_site.get(site, []))
+            out.extend(self.unpriced.get(site, []))
+        return out
+
+    def site_items(self, site: str) -> List[Product]:
+        return self.by_site.get(site, []) + self.unpriced.get(site, [])
+
+    def iter_sorted(self, sites: Optional[set] = None, bans: Optional[List[str]] = None) -> Iterator[Product]:
+        # Fiyatı > 0 olan ürünler artan fiyatla; sites None ise tüm siteler.
+        lists = [ps for site, ps in self.by_site.items() if sites is None or site in sites]
+        merged = heapq.merge(*lists, key=_price)
+        if not bans:
+            return merged
+        bans_cf = [b.casefold() for b in bans]
+        return (p for p in merged if not any(b in (p.name or "").casefold() for b in bans_cf))
+
+    def cheapest(self, n: int, sites: Optional[set] = None, bans: Optional[List[str]] = None) -> List[Product]:
+        return list(islice(self.iter_sorted(sites, bans), n))
+
+
+@dataclass
+class IndexedEntry:
+    index: ResultIndex
+    stored: float
+    expires: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored
+
+
+class IndexCache:
+    """Cache kayıtları için kurulmuş ResultIndex'leri süreç içinde tutar (LRU).
+
+    Anahtar başına bir index saklanır ve kaydın stored zamanıyla birlikte
+    tutulur; kayıt yenilenince index yeniden kurulur. Böylece aynı sorgunun
+    filtreli tekrarları düz listeyi her istekte yeniden gruplamaz.
+    """
+
+    def __init__(self, size: int = INDEX_CACHE_SIZE):
+        self.size = max(1, size)
+        self._data: "OrderedDict[str, IndexedEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[IndexedEntry]:
+        with self._lock:
+            ent = self._data.get(key)
+            if ent is None:
+                return None
+            if ent.expires <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return ent
+
+    def put(self, key: str, index: ResultIndex, stored: float, expires: float) -> IndexedEntry:
+        ent = IndexedEntry(index, stored, expires)
+        with self._lock:
+            self._data[key] = ent
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+        return ent
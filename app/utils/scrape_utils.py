@@ -1,27 +1,83 @@
-from typing import Tuple
+import os
+import time
+from typing import Optional, Tuple
 
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait as W
 from selenium.webdriver.support import expected_conditions as EC
 
+from app.utils.driver_pool import block_urls, get_pool, new_driver, release_driver
+from app.utils.html_engines import HtmlEngine, get_engine
 from app.utils.log_config import logger
+from app.utils.metrics import READINESS_TOTAL, SCRAPE_STAGE_SECONDS
+from app.utils.readiness import ReadyResult, record_wait, wait_ready
+from app.utils.scraper_models import BrowserProfile, Readiness
 
+USE_DRIVER_POOL = os.environ.get("DRIVER_POOL", "1") == "1"
 
-def open_browser(timeout: int = 12) -> Tuple[webdriver.Chrome, W]:
-    d = webdriver.Chrome()
+
+def open_browser(timeout: int = 12, pooled: bool = USE_DRIVER_POOL,
+                 profile: Optional[BrowserProfile] = None) -> Tuple[webdriver.Chrome, W]:
+    profile = profile or BrowserProfile()
+    d = get_pool(profile).checkout() if pooled else new_driver(profile)
+    if profile.blocked_urls:
+        try:
+            block_urls(d, profile.blocked_urls)
+        except Exception as e:
+            logger.warning(f"URL blocking could not be applied: {e}")
     w = W(d, timeout)
     return d, w
 
 
 def close_browser(d):
+    # Havuzdan gelen sürücü havuza döner, diğerleri kapatılır.
+    if release_driver(d):
+        return
     try:
         d.quit()
     except Exception:
         pass
 
 
+def wait_for_items(d, site: str, item_sel: str, ready: Readiness, timeout: float) -> ReadyResult:
+    # Sitenin readiness ayarlarıyla bekler ve süreyi kaydeder.
+    result = wait_ready(
+        d, item_sel,
+        min_items=ready.min_items,
+        stable_ms=ready.stable_ms,
+        no_results_sel=ready.no_results_sel,
+        timeout=ready.timeout if ready.timeout is not None else timeout,
+        poll_ms=ready.poll_ms,
+        sparse_ms=ready.sparse_ms,
+    )
+    record_wait(site, result)
+    SCRAPE_STAGE_SECONDS.observe(result.elapsed, site=site, stage="readiness")
+    READINESS_TOTAL.inc(site=site, outcome=result.outcome)
+    return result
+
+
+SCROLL_JS = """
+const itemSel = arguments[0];
+window.scrollBy(0, Math.max(window.innerHeight, 600));
+return document.querySelectorAll(itemSel).length;
+"""
+
+
+def scroll_for_items(d, item_sel: str, steps: int, pause_ms: int = 400) -> int:
+    # Sonsuz kaydırmalı listelerde aşağı kaydırıp yeni kartların yüklenmesini bekler.
+    # Bir adımda kart sayısı artmadıysa liste bitmiş sayılır.
+    count = -1
+    for _ in range(steps):
+        new_count = d.execute_script(SCROLL_JS, item_sel)
+        time.sleep(pause_ms / 1000)
+        if new_count == count:
+            break
+        count = new_count
+    return count
+
+
 def reject_cookies(w: W, *ids: str) -> bool:
     for btn_id in ids:
         try:
@@ -33,58 +89,29 @@ def reject_cookies(w: W, *ids: str) -> bool:
     return False
 
 
-def make_soup(d) -> BeautifulSoup:
-    return BeautifulSoup(d.page_source, "html.parser")
-
-
-def first_text(root, *sels):
-    for s in sels:
-        el = root.select_one(s)
-        if el:
-            txt = el.get_text(strip=True)
-            if txt:
-                return txt
-    return ""
+def parse_html(html: str, engine: Optional[HtmlEngine] = None, parse_only: Optional[SoupStrainer] = None):
+    return (engine or get_engine()).parse(html, parse_only)
 
 
-def first_href(root, *sels):
-    for s in sels:
-        el = root.select_one(s)
-        if el and el.has_attr("href"):
-            return el["href"].strip()
-    return ""
-
-
-def extract_texts(el, selectors: list[str]) -> str:
-    parts = []
-    for sel in selectors:
-        node = el.select_one(sel)
-        if node:
-            txt = node.get_text(strip=True)
-            if txt:
-                parts.append(txt)
-    return " ".join(parts).strip()
-
-
-def safe_find(root, by: By, selector: str):
-    # Elemana güvenli erişim. Bulamazsa None döner.
-    try:
-        return root.find_element(by, selector)
-    except Exception as e:
-        logger.warning(f"[safe_find] Selector not found: {selector} ({by}) – {e}")
-        return None
+def make_soup(d, engine: Optional[HtmlEngine] = None, parse_only: Optional[SoupStrainer] = None):
+    return parse_html(d.page_source, engine, parse_only)
 
 
-def safe_text(root, by: By, selector: str) -> str:
-    # Elemana güvenli erişim + text alma
-    el = safe_find(root, by, selector)
-    return el.text.strip() if el else ""
+# item_sel ile eşleşen kartların outerHTML'ini döndürür; iç içe eşleşmeler ve
+# (verilmişse) sponsorlu kartlar tarayıcı tarafında elenir.
+ITEM_HTML_JS = """
+const [itemSel, sponsoredSel] = arguments;
+const out = [];
+for (const el of document.querySelectorAll(itemSel)) {
+    if (el.parentElement && el.parentElement.closest(itemSel)) continue;
+    if (sponsoredSel && el.querySelector(sponsoredSel)) continue;
+    out.push(el.outerHTML);
+}
+return out;
+"""
 
 
-def safe_first_text(root, selectors: list[str]) -> str:
-    # Birden fazla CSS selector dene, ilk dolu sonucu dön.
-    for sel in selectors or []:
-        txt = safe_text(root, By.CSS_SELECTOR, sel)
-        if txt:
-            return txt
-    return ""
+def item_html(d, item_sel: str, sponsored_sel: Optional[str] = None) -> str:
+    # page_source yerine sadece sonuç kartlarını aktarır (Amazon/Trendyol'da MB'larca daha az veri).
+    parts = d.execute_script(ITEM_HTML_JS, item_sel, sponsored_sel) or []
+    return "<html><body>" + "\n".join(parts) + "</body></html>"
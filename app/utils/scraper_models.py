@@ -1,10 +1,80 @@
 import json
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from app.utils.log_config import logger
 
 
+# Tüm sitelerin ortak yalın profili: görsel, font, medya, CSS ve reklam/tracker istekleri kesilir.
+# Site spec'leri sadece farklı olanı yazar (ör. allowed_urls ile CSS'i açmak).
+DEFAULT_BLOCKED_URLS = [
+    "*.jpg",
+    "*.jpeg",
+    "*.png",
+    "*.gif",
+    "*.webp",
+    "*.avif",
+    "*.svg",
+    "*.ico",
+    "*.mp4",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.css",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*facebook.net*",
+    "*criteo.*",
+    "*hotjar.com*",
+    "*adservice.google.*",
+]
+
+
+@dataclass
+class BrowserProfile:
+    headless: bool = True
+    # "normal" | "eager" (DOMContentLoaded) | "none"
+    page_load_strategy: str = "eager"
+    disable_images: bool = True
+    # CDP Network.setBlockedURLs kalıpları, ör. "*.woff2", "*doubleclick.net*"
+    blocked_urls: List[str] = field(default_factory=lambda: list(DEFAULT_BLOCKED_URLS))
+    # blocked_urls'ten çıkarılacak kalıplar; varsayılan listeyi kopyalamadan istisna tanımlamak için
+    allowed_urls: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.allowed_urls:
+            self.blocked_urls = [p for p in self.blocked_urls if p not in self.allowed_urls]
+
+    def launch_key(self) -> Tuple:
+        # Chrome başlatılırken verilmesi gereken ayarlar; aynı key'e sahip profiller sürücü paylaşabilir
+        return self.headless, self.page_load_strategy, self.disable_images
+
+
+def as_profile(value) -> BrowserProfile:
+    return value if isinstance(value, BrowserProfile) else BrowserProfile(**(value or {}))
+
+
+@dataclass
+class Readiness:
+    # Sayfa hazır: en az min_items kart ve sayı stable_ms boyunca sabit
+    min_items: int = 1
+    stable_ms: int = 0
+    # min_items'tan az kart bu süre sabit kalırsa da hazır (None = 2 * stable_ms)
+    sparse_ms: Optional[int] = None
+    # Bu seçici görünür ve hiç kart yoksa beklemeden çıkılır
+    no_results_sel: Optional[str] = None
+    # None ise scraper'ın timeout parametresi kullanılır
+    timeout: Optional[float] = None
+    poll_ms: int = 100
+
+
+def as_readiness(value) -> Readiness:
+    return value if isinstance(value, Readiness) else Readiness(**(value or {}))
+
+
 @dataclass
 class Bs4Scraper:
     website: str
@@ -17,6 +87,18 @@ class Bs4Scraper:
     reject_cookie_ids: List[str] = field(default_factory=list)
     id_attr: Optional[str] = None
     dp_path: Optional[str] = None
+    # "http": sayfa tarayıcısız indirilir, item_sel eşleşmezse "browser"a düşülür
+    fetch_mode: str = "browser"
+    # "html.parser" | "lxml" | "selectolax"; None ise HTML_PARSER ortam değişkeni
+    parser: Optional[str] = None
+    # "page": tüm page_source aktarılır, "items": tarayıcı sadece item_sel kartlarını döndürür
+    transfer_mode: str = "page"
+    browser: BrowserProfile = field(default_factory=BrowserProfile)
+    ready: Readiness = field(default_factory=Readiness)
+
+    def __post_init__(self):
+        self.browser = as_profile(self.browser)
+        self.ready = as_readiness(self.ready)
 
 
 @dataclass
@@ -28,6 +110,12 @@ class SelScraper:
     root_xpath: Optional[str] = None
     brand_sel: Optional[str] = None
     price_sel: List[str] = field(default_factory=list)
+    browser: BrowserProfile = field(default_factory=BrowserProfile)
+    ready: Readiness = field(default_factory=Readiness)
+
+    def __post_init__(self):
+        self.browser = as_profile(self.browser)
+        self.ready = as_readiness(self.ready)
 
 
 def load_bs4_scrapers(path: str) -> list[Bs4Scraper]:
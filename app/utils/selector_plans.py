@@ -0,0 +1,97 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from bs4 import SoupStrainer
+
+from app.utils.html_engines import HtmlEngine, get_engine
+from app.utils.scraper_models import Bs4Scraper
+
+# "div.p-card-wrppr" / "div.s-result-item[data-asin]:not(...)" gibi tek bileşik seçicinin başı
+_COMPOUND_HEAD = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*)?(?:\.(?P<cls>[\w-]+))?")
+
+
+@dataclass
+class Bs4Plan:
+    """Bs4Scraper'ın yükleme anında derlenmiş hali.
+
+    Seçiciler sitenin HTML motoru (engine) ile bir kez derlenir; strainer ise
+    (varsa) BeautifulSoup motorlarında sayfanın sadece item_sel kapsayıcılarını
+    ağaca almak için kullanılır.
+    """
+    website: str
+    base_url: str
+    engine: HtmlEngine
+    item: Any
+    title: List[Any] = field(default_factory=list)
+    price: List[Any] = field(default_factory=list)
+    link: List[Any] = field(default_factory=list)
+    sponsored: Optional[Any] = None
+    id_attr: Optional[str] = None
+    dp_path: Optional[str] = None
+    strainer: Optional[SoupStrainer] = None
+    # Tarayıcıdan sadece kart outerHTML'leri alınabilir mi (item_sel kart dışına bakmıyorsa)
+    items_only: bool = False
+
+
+def _top_level_combinator(selector: str) -> bool:
+    # Köşeli parantez / parantez dışında boşluk ya da >, +, ~, "," var mı
+    depth = 0
+    quote = ""
+    for ch in selector.strip():
+        if quote:
+            if ch == quote:
+                quote = ""
+        elif ch in "\"'":
+            quote = ch
+        elif ch in "[(":
+            depth += 1
+        elif ch in "])":
+            depth -= 1
+        elif depth == 0 and (ch.isspace() or ch in ">+~,"):
+            return True
+    return False
+
+
+def _class_token(cls: str):
+    # parse_only sırasında class değeri bölünmemiş string ("a b") olarak gelebiliyor
+    def match(value) -> bool:
+        if not value:
+            return False
+        tokens = value.split() if isinstance(value, str) else value
+        return cls in tokens
+    return match
+
+
+def item_strainer(item_sel: str) -> Optional[SoupStrainer]:
+    # item_sel tek bir bileşik seçiciyse (etiket ve/veya sınıf ile başlıyorsa) onu parse_only
+    # olarak kullanılabilecek bir SoupStrainer'a çevirir; değilse None (tüm sayfa parse edilir).
+    if _top_level_combinator(item_sel):
+        return None
+    m = _COMPOUND_HEAD.match(item_sel.strip())
+    tag, cls = m.group("tag"), m.group("cls")
+    if not (tag or cls):
+        return None
+    return SoupStrainer(tag, attrs={"class": _class_token(cls)} if cls else {})
+
+
+def compile_bs4_plan(spec: Bs4Scraper) -> Bs4Plan:
+    engine = get_engine(spec.parser)
+    return Bs4Plan(
+        website=spec.website,
+        base_url=spec.base_url,
+        engine=engine,
+        item=engine.compile(spec.item_sel),
+        title=[engine.compile(s) for s in spec.title_sel],
+        price=[engine.compile(s) for s in spec.price_sel],
+        link=[engine.compile(s) for s in spec.link_sel],
+        sponsored=engine.compile(spec.sponsored_sel) if spec.sponsored_sel else None,
+        id_attr=spec.id_attr,
+        dp_path=spec.dp_path,
+        strainer=item_strainer(spec.item_sel),
+        items_only=spec.transfer_mode == "items" and not _top_level_combinator(spec.item_sel),
+    )
+
+
+def compile_bs4_plans(specs: List[Bs4Scraper]) -> List[Bs4Plan]:
+    return [compile_bs4_plan(spec) for spec in specs]
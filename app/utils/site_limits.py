@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from app.utils.log_config import logger
+from app.utils.metrics import SITE_QUEUE_WAIT_SECONDS, SITE_QUEUE_WAITING
+from app.utils.url_composer import load_websites
+
+WEBSITES_PATH = os.environ.get("WEBSITES_PATH", "data/websites.json")
+# Sırada bekleyen bir taramanın vazgeçmeden önce bekleyeceği en uzun süre
+LIMIT_QUEUE_TIMEOUT = float(os.environ.get("LIMIT_QUEUE_TIMEOUT", "60"))
+
+
+class SiteLimiter:
+    """Tek bir site için eşzamanlı oturum sınırı + token bucket hız sınırı.
+
+    Bekleyenler geliş sırasıyla (FIFO) sıra alır; böylece bir sorgunun
+    sayfaları diğer sorguları geride bırakamaz. Oturum alındıktan sonra
+    token bucket'tan bir istek hakkı ayrılır, hak yoksa dolana kadar beklenir.
+    max_sessions / rps 0 ise ilgili sınır uygulanmaz.
+    """
+
+    def __init__(self, site: str, max_sessions: int = 0, rps: float = 0, burst: int = 1):
+        self.site = site
+        self.max_sessions = max(0, max_sessions)
+        self.rps = max(0.0, rps)
+        self.burst = max(1, burst)
+        self.active = 0
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._waiters: "deque[object]" = deque()
+        self._cond = threading.Condition()
+
+    def _reserve_token(self) -> float:
+        # _cond tutulurken çağrılır; token ayırır ve kullanılabilmesi için beklenecek süreyi döner
+        if not self.rps:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rps)
+        self._refilled = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rps
+
+    def _full(self) -> bool:
+        return bool(self.max_sessions) and self.active >= self.max_sessions
+
+    def acquire(self, timeout: float = LIMIT_QUEUE_TIMEOUT) -> float:
+        # Sıra gelene, oturum boşalana ve token hazır olana kadar bekler; toplam bekleme süresini döner.
+        # timeout içinde kullanılamayacak oturum ya da token alınmaz.
+        started = time.monotonic()
+        if timeout <= 0:
+            raise TimeoutError(f"[{self.site}] No time left to wait for a scrape slot")
+        ticket = object()
+        with SITE_QUEUE_WAITING.track(site=self.site):
+            with self._cond:
+                self._waiters.append(ticket)
+                try:
+                    while self._waiters[0] is not ticket or self._full():
+                        left = timeout - (time.monotonic() - started)
+                        if left <= 0:
+                            raise TimeoutError(f"[{self.site}] No scrape slot within {timeout:g}s")
+                        self._cond.wait(left)
+                finally:
+                    self._waiters.remove(ticket)
+                    self._cond.notify_all()
+                self.active += 1
+                delay = self._reserve_token()
+                if delay and time.monotonic() - started + delay > timeout:
+                    self._tokens += 1
+                    self.active -= 1
+                    self._cond.notify_all()
+                    raise TimeoutError(f"[{self.site}] No request token within {timeout:g}s")
+            if delay:
+                time.sleep(delay)
+        waited = time.monotonic() - started
+        SITE_QUEUE_WAIT_SECONDS.observe(waited, site=self.site)
+        return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, timeout: float = LIMIT_QUEUE_TIMEOUT):
+        self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def load_limits(path: str = WEBSITES_PATH) -> Dict[str, Tuple[int, float]]:
+    # site -> (maxSessions, rps); worker'lar için aynı sınırları görev deposu da uygular
+    return {w.name.lower(): (w.maxSessions, w.rps) for w in load_websites(path)}
+
+
+_LIMITERS: Optional[Dict[str, SiteLimiter]] = None
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(site: str) -> SiteLimiter:
+    # websites.json ilk kullanımda okunur; listede olmayan siteler sınırsızdır
+    global _LIMITERS
+    with _LIMITERS_LOCK:
+        if _LIMITERS is None:
+            _LIMITERS = {}
+            for name, (sessions, rps) in load_limits().items():
+                _LIMITERS[name] = SiteLimiter(name, sessions, rps)
+                if sessions or rps:
+                    logger.info(f"[{name}] Scrape limits: {sessions or 'unlimited'} sessions, "
+                                f"{rps or 'unlimited'} req/s")
+        limiter = _LIMITERS.get(site)
+        if limiter is None:
+            limiter = _LIMITERS[site] = SiteLimiter(site)
+        return limiter
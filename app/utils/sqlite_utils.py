@@ -0,0 +1,27 @@
+import sqlite3
+import threading
+
+
+class LocalConnections:
+    """Thread başına tek SQLite bağlantısı açan fabrika.
+
+    sqlite3 bağlantıları thread'ler arasında paylaşılmamalı; her thread ilk
+    conn() çağrısında kendi bağlantısını açar ve sonra onu kullanır. WAL modu
+    okuyucuların yazıcıyı beklemesini engeller, busy_timeout eşzamanlı
+    yazmalarda "database is locked" hatası yerine kısa bir bekleme sağlar.
+    """
+
+    def __init__(self, path: str, timeout: float = 10):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+        return conn
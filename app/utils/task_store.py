@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.utils.cache import decode_products, encode_products
+from app.utils.product import Product
+from app.utils.site_limits import load_limits
+from app.utils.sqlite_utils import LocalConnections
+
+TASK_STORE_PATH = os.environ.get("TASK_STORE_PATH", "data/tasks.sqlite3")
+# Worker bu süre içinde heartbeat atmazsa görev başka bir worker'a verilir
+TASK_LEASE = float(os.environ.get("TASK_LEASE", "60"))
+TASK_MAX_ATTEMPTS = int(os.environ.get("TASK_MAX_ATTEMPTS", "3"))
+# Hata sonrası yeniden denemeden önce beklenecek süre (deneme sayısıyla çarpılır)
+TASK_RETRY_DELAY = float(os.environ.get("TASK_RETRY_DELAY", "5"))
+# Biten görevler bu kadar saniye sonra silinir
+TASK_KEEP_SECONDS = float(os.environ.get("TASK_KEEP_SECONDS", "3600"))
+
+QUEUED, LEASED, DONE, FAILED = "queued", "leased", "done", "failed"
+
+
+@dataclass
+class Task:
+    id: int
+    site: str
+    url: str
+    scroll_steps: int
+    attempts: int
+
+
+@dataclass
+class TaskResult:
+    # status: done | failed; süre dolduysa görevin son durumu (queued | leased)
+    status: str
+    items: List[Product] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class TaskStore:
+    """Süreçler (ve makineler arası paylaşılan dosya) arası sayfa tarama kuyruğu.
+
+    Web süreci enqueue() ile görev ekleyip wait() ile sonucu bekler; worker'lar
+    claim() ile bir görevi TASK_LEASE süreliğine kiralar, heartbeat() ile
+    kirayı uzatır ve complete()/fail() ile bitirir. Kirası dolan görev (worker
+    çöktü) yeniden kuyruğa düşer; TASK_MAX_ATTEMPTS denemeden sonra failed olur.
+
+    limits (site -> (maxSessions, rps)) verilirse tüm worker'lar için tek sınır
+    olarak claim() içinde uygulanır: kirada en fazla maxSessions görev olabilir ve
+    aynı sitenin iki görevi arasında en az 1/rps saniye geçer.
+    """
+
+    PURGE_EVERY = 100
+
+    def __init__(self, path: str = TASK_STORE_PATH, lease: float = TASK_LEASE,
+                 max_attempts: int = TASK_MAX_ATTEMPTS, retry_delay: float = TASK_RETRY_DELAY,
+                 limits: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.limits = {site: lim for site, lim in (limits or {}).items() if lim[0] or lim[1]}
+        self._db = LocalConnections(path)
+        self._writes = 0
+        conn = self._db.conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " site TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " scroll_steps INTEGER NOT NULL DEFAULT 0,"
+            " status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " available_at REAL NOT NULL,"
+            " lease_owner TEXT,"
+            " lease_expires REAL,"
+            " result BLOB,"
+            " error TEXT,"
+            " updated REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS tasks_claim ON tasks(status, site, available_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS tasks_url ON tasks(url, status)")
+        conn.execute("CREATE TABLE IF NOT EXISTS site_claims (site TEXT PRIMARY KEY, last_claim REAL NOT NULL)")
+
+    def enqueue(self, site: str, url: str, scroll_steps: int = 0) -> int:
+        # Aynı URL için bekleyen ya da çalışan görev varsa onun id'si döner
+        now = time.time()
+        conn = self._db.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM tasks WHERE url = ? AND status IN (?, ?) ORDER BY id DESC LIMIT 1",
+                (url, QUEUED, LEASED),
+            ).fetchone()
+            if row is None:
+                cur = conn.execute(
+                    "INSERT INTO tasks (site, url, scroll_steps, status, available_at, updated)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (site, url, scroll_steps, QUEUED, now, now),
+                )
+                task_id = cur.lastrowid
+            else:
+                task_id = row[0]
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge()
+        return task_id
+
+    def _limited_sites(self, conn, now: float) -> List[str]:
+        # BEGIN IMMEDIATE içinde çağrılır; oturumu dolu ya da hız aralığı geçmemiş siteler
+        if not self.limits:
+            return []
+        leased = dict(conn.execute(
+            "SELECT site, COUNT(*) FROM tasks WHERE status = ? AND lease_expires >= ? GROUP BY site", (LEASED, now)
+        ).fetchall())
+        last = dict(conn.execute("SELECT site, last_claim FROM site_claims").fetchall())
+        blocked = []
+        for site, (sessions, rps) in self.limits.items():
+            if (sessions and leased.get(site, 0) >= sessions) or (rps and now - last.get(site, 0.0) < 1 / rps):
+                blocked.append(site)
+        return blocked
+
+    def claim(self, owner: str, sites: Optional[Iterable[str]] = None) -> Optional[Task]:
+        now = time.time()
+        site_list = sorted(set(sites)) if sites else []
+        site_sql = f" AND site IN ({','.join('?' * len(site_list))})" if site_list else ""
+        conn = self._db.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Kirası dolmuş ve deneme hakkı bitmiş görevler kapatılır
+            conn.execute(
+                "UPDATE tasks SET status = ?, error = 'lease expired', updated = ?"
+                " WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, self.max_attempts),
+            )
+            blocked = self._limited_sites(conn, now)
+            blocked_sql = f" AND site NOT IN ({','.join('?' * len(blocked))})" if blocked else ""
+            row = conn.execute(
+                "SELECT id, site, url, scroll_steps, attempts FROM tasks"
+                " WHERE ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?))"
+                + site_sql + blocked_sql + " ORDER BY id LIMIT 1",
+                (QUEUED, now, LEASED, now, *site_list, *blocked),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?,"
+                " updated = ? WHERE id = ?",
+                (LEASED, owner, now + self.lease, now, row[0]),
+            )
+            if row[1] in self.limits:
+                conn.execute("INSERT OR REPLACE INTO site_claims (site, last_claim) VALUES (?, ?)", (row[1], now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return Task(id=row[0], site=row[1], url=row[2], scroll_steps=row[3], attempts=row[4] + 1)
+
+    def heartbeat(self, task_id: int, owner: str) -> bool:
+        # Kira hâlâ bu worker'daysa uzatılır; False ise görev başkasına geçmiştir
+        now = time.time()
+        cur = self._db.conn().execute(
+            "UPDATE tasks SET lease_expires = ?, updated = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+            (now + self.lease, now, task_id, LEASED, owner),
+        )
+        return cur.rowcount > 0
+
+    def complete(self, task_id: int, owner: str, items: List[Product]) -> bool:
+        cur = self._db.conn().execute(
+            "UPDATE tasks SET status = ?, result = ?, error = NULL, lease_expires = NULL, updated = ?"
+            " WHERE id = ? AND status = ? AND lease_owner = ?",
+            (DONE, encode_products(items), time.time(), task_id, LEASED, owner),
+        )
+        return cur.rowcount > 0
+
+    def fail(self, task_id: int, owner: str, error: str) -> bool:
+        now = time.time()
+        conn = self._db.conn()
+        row = conn.execute(
+            "SELECT attempts FROM tasks WHERE id = ? AND status = ? AND lease_owner = ?",
+            (task_id, LEASED, owner),
+        ).fetchone()
+        if row is None:
+            return False
+        if row[0] >= self.max_attempts:
+            status, available_at = FAILED, now
+        else:
+            status, available_at = QUEUED, now + self.retry_delay * row[0]
+        cur = conn.execute(
+            "UPDATE tasks SET status = ?, error = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL,"
+            " updated = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+            (status, error, available_at, now, task_id, LEASED, owner),
+        )
+        return cur.rowcount > 0
+
+    def wait(self, task_id: int, timeout: float, poll: float = 0.2) -> TaskResult:
+        # Görev bitene ya da süre dolana kadar bekler
+        end = time.monotonic() + timeout
+        while True:
+            row = self._db.conn().execute("SELECT status, result, error FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row is None:
+                return TaskResult(FAILED, error="task not found")
+            if row[0] == DONE:
+                return TaskResult(DONE, decode_products(row[1]))
+            if row[0] == FAILED or time.monotonic() >= end:
+                return TaskResult(row[0], error=row[2])
+            time.sleep(poll)
+
+    def purge(self, keep_seconds: float = TASK_KEEP_SECONDS) -> int:
+        cur = self._db.conn().execute(
+            "DELETE FROM tasks WHERE status IN (?, ?) AND updated < ?", (DONE, FAILED, time.time() - keep_seconds)
+        )
+        return max(cur.rowcount, 0)
+
+
+_STORE: Optional[TaskStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_task_store() -> TaskStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = TaskStore(limits=load_limits())
+        return _STORE
@@ -14,6 +14,15 @@ class Website:
     queryParamKeys: List[str]
     joiner: str = "+"
     extraParams: str = ""
+    # Sayfalama: pageParam ile 2..maxPages sayfaları, pageConcurrency kadarı aynı anda
+    pageParam: str = ""
+    maxPages: int = 1
+    pageConcurrency: int = 2
+    # Sonsuz kaydırmalı sayfalarda okumadan önce kaç kez aşağı kaydırılsın
+    scrollSteps: int = 0
+    # Siteye aynı anda açık en fazla tarama ve saniyedeki sayfa isteği (0 = sınırsız)
+    maxSessions: int = 0
+    rps: float = 0
 
 def load_websites(path: str) -> List[Website]:
     try:
@@ -24,7 +33,7 @@ def load_websites(path: str) -> List[Website]:
         logger.error(f"Failed to load websites from {path}: {e}", exc_info=True)
         return []
 
-def build_url(website: Website, keywords: List[str]) -> str:
+def build_url(website: Website, keywords: List[str], page: int = 1) -> str:
     encoded = [quote(k, safe="") for k in keywords]
     joined = website.joiner.join(encoded)
 
@@ -33,4 +42,6 @@ def build_url(website: Website, keywords: List[str]) -> str:
     url = f"{website.baseUrl}?{params}"
     if website.extraParams:
         url += "&" + website.extraParams.lstrip("&?")
+    if page > 1 and website.pageParam:
+        url += f"&{website.pageParam}={page}"
     return url
\ No newline at end of file
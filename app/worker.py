@@ -0,0 +1,114 @@
+import argparse
+import os
+import socket
+import threading
+from typing import List, Optional, Set
+
+from app.scrapers.collector import SCRAPER_MAP, run_scraper
+from app.utils.driver_pool import DRIVER_POOL_SIZE
+from app.utils.log_config import logger
+from app.utils.task_store import Task, TaskStore, get_task_store
+from app.utils.url_composer import load_websites
+
+# Kuyruk boşken yeni görev için bekleme aralığı (saniye)
+WORKER_POLL = float(os.environ.get("WORKER_POLL", "0.5"))
+
+
+class ScrapeWorker:
+    """Görev deposundan sayfa tarama görevlerini alıp çalıştırır.
+
+    concurrency kadar thread aynı anda görev kiralar; ayrı bir thread
+    çalışan görevlerin kirasını TASK_LEASE / 3 aralıkla yeniler. sites
+    verilirse yalnızca o sitelerin görevleri alınır.
+    """
+
+    def __init__(self, store: TaskStore, sites: Optional[List[str]] = None,
+                 concurrency: int = DRIVER_POOL_SIZE, worker_id: Optional[str] = None):
+        self.store = store
+        self.sites = sites or None
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._active: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self) -> None:
+        logger.info(f"[worker {self.worker_id}] Starting {self.concurrency} threads for sites: "
+                    f"{', '.join(self.sites) if self.sites else 'all'}")
+        threads = [threading.Thread(target=self._heartbeat, name="worker-heartbeat", daemon=True)]
+        threads += [threading.Thread(target=self._loop, name=f"worker-{i}", daemon=True)
+                    for i in range(self.concurrency)]
+        for t in threads:
+            t.start()
+        try:
+            while not self._stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
+        for t in threads:
+            t.join()
+        logger.info(f"[worker {self.worker_id}] Stopped")
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                task = self.store.claim(self.worker_id, self.sites)
+            except Exception as e:
+                logger.error(f"[worker {self.worker_id}] Claim failed: {e}", exc_info=True)
+                task = None
+            if task is None:
+                self._stop.wait(WORKER_POLL)
+                continue
+            self.run_task(task)
+
+    def run_task(self, task: Task) -> None:
+        entry = SCRAPER_MAP.get(task.site)
+        if not entry:
+            self.store.fail(task.id, self.worker_id, f"No scraper entry for site '{task.site}'")
+            return
+        with self._lock:
+            self._active.add(task.id)
+        try:
+            # Site sınırları claim() sırasında tüm worker'lar için uygulandı
+            result = run_scraper(task.site, entry["func"], entry["index"], task.url, task.scroll_steps,
+                                 limited=False)
+        except Exception as e:
+            logger.error(f"[{task.site}] Task {task.id} attempt {task.attempts} failed: {e}", exc_info=True)
+            self.store.fail(task.id, self.worker_id, str(e))
+            return
+        finally:
+            with self._lock:
+                self._active.discard(task.id)
+        if result.failed:
+            # Boş sayfa başarılı sonuçtur; hata ve hız sınırı yeniden denenir
+            logger.warning(f"[{task.site}] Task {task.id} attempt {task.attempts} {result.outcome}: {result.error}")
+            self.store.fail(task.id, self.worker_id, f"{result.outcome}: {result.error}")
+            return
+        if not self.store.complete(task.id, self.worker_id, result.items):
+            logger.warning(f"[{task.site}] Task {task.id} lease was lost, result dropped")
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.store.lease / 3):
+            with self._lock:
+                active = list(self._active)
+            for task_id in active:
+                try:
+                    if not self.store.heartbeat(task_id, self.worker_id):
+                        logger.warning(f"[worker {self.worker_id}] Lost lease on task {task_id}")
+                except Exception as e:
+                    logger.error(f"[worker {self.worker_id}] Heartbeat failed: {e}", exc_info=True)
+
+
+if __name__ == "__main__":
+    site_names = [w.name.lower() for w in load_websites("data/websites.json")]
+
+    parser = argparse.ArgumentParser(description="Scrape worker: runs page scrape tasks from the shared task store")
+    parser.add_argument("--sites", nargs="*", choices=site_names, help="only take tasks for these sites")
+    parser.add_argument("--concurrency", type=int, default=DRIVER_POOL_SIZE, help="parallel scrapes")
+    parser.add_argument("--id", dest="worker_id", help="worker id used for leases (default host-pid)")
+    args = parser.parse_args()
+
+    ScrapeWorker(get_task_store(), args.sites, args.concurrency, args.worker_id).run()